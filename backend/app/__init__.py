@@ -1,18 +1,19 @@
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from app.config import Config
+import atexit
 import os
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     db.init_app(app)
     migrate.init_app(app, db)
@@ -20,10 +21,22 @@ def create_app():
     
     CORS(app)
     
+    from app.utils.cache_sync import init_cache_sync
+    init_cache_sync(app)
+    from app.utils.catalog_cache import init_catalog_cache
+    init_catalog_cache(app)
+    from app.utils.availability import init_availability_cache
+    init_availability_cache(app)
+    from app.utils.pricing import init_pricing_cache
+    init_pricing_cache(app)
+    
     from app.models.user import User
-    from app.models.asset import Asset, AssetImage
+    from app.models.asset import Asset, AssetImage, ImageBlob
     from app.models.booking import Booking
     from app.models.review import Review
+    from app.models.upload import UploadSession
+    from app.models.pricing import PriceRule
+    from app.models.cache_version import CacheVersion
     
     from app.routes.auth import auth_bp
     from app.routes.assets import assets_bp
@@ -31,6 +44,7 @@ def create_app():
     from app.routes.reviews import reviews_bp
     from app.routes.earnings import earnings_bp
     from app.routes.cleanup import cleanup_bp
+    from app.routes.uploads import uploads_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(assets_bp, url_prefix='/api/assets')
@@ -38,14 +52,26 @@ def create_app():
     app.register_blueprint(reviews_bp, url_prefix='/api/reviews')
     app.register_blueprint(earnings_bp, url_prefix='/api/earnings')
     app.register_blueprint(cleanup_bp, url_prefix='/api/cleanup')
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
+    
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # Image worker pool: finish queued jobs when the process exits
+    from app.utils.image_worker import init_image_worker
+    image_worker = init_image_worker(app)
+    atexit.register(image_worker.shutdown)
+    # Registers the hooks that delete files of removed images after commit
+    from app.utils import image_gc
+    
+    from app.utils.file_serving import serve_upload
+    if app.config.get('UPLOAD_OFFLOAD') == 'x-sendfile':
+        app.config['USE_X_SENDFILE'] = True
     
-    @app.route('/uploads/assets/<filename>')
+    @app.route('/uploads/assets/<path:filename>')
     def uploaded_file(filename):
         upload_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'assets')
-        print(f"[UPLOAD] Trying to serve: {filename}")
-        print(f"[UPLOAD] From directory: {upload_dir}")
-        print(f"[UPLOAD] File exists: {os.path.exists(os.path.join(upload_dir, filename))}")
-        return send_from_directory(upload_dir, filename)
+        return serve_upload(upload_dir, filename, size=request.args.get('size'))
     
     @app.route('/')
     def health_check():
@@ -0,0 +1,343 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import AppGroup
+from app import db
+from app.models.asset import Asset, AssetImage, AssetType, ImageBlob
+from app.models.booking import Booking, BookingStatus, ACTIVE_BOOKING_STATUSES
+from app.models.review import Review
+from app.models.user import User, UserType
+from app.utils.asset_import import import_assets, iter_csv_rows, iter_ndjson_rows
+from app.utils.booking_maintenance import MAINTENANCE_BATCH_SIZE, run_booking_maintenance
+from app.utils.file_upload import (
+    ASSET_UPLOAD_FOLDER, ASSET_URL_PREFIX, asset_image_path, relative_upload_path,
+    resolve_upload_folder, sharded_name
+)
+from app.utils.image_gc import DEFAULT_GRACE_SECONDS, SWEEP_BATCH_SIZE, sweep_orphaned_files, sweep_upload_sessions
+from app.utils.image_processing import extract_metadata, generate_variants, images_supported
+from app.utils.image_worker import process_asset_image
+from app.utils.catalog_cache import mark_rankings_changed
+from app.utils.reservations import BookingConflict, reserve_asset
+from app.utils.search import rebuild_search_index
+
+assets_cli = AppGroup('assets', help='Asset catalog maintenance commands.')
+images_cli = AppGroup('images', help='Uploaded image maintenance commands.')
+bookings_cli = AppGroup('bookings', help='Booking maintenance and diagnostics commands.')
+
+@assets_cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the full-text search index from the assets table"""
+    if rebuild_search_index():
+        click.echo('Search index rebuilt')
+    else:
+        click.echo('Full-text search is only available on SQLite; nothing to rebuild')
+
+@assets_cli.command('recompute-rankings')
+def recompute_rankings_command():
+    """Recalculate rating and popularity ranking columns from reviews and bookings"""
+    asset_reviews = db.and_(Review.asset_id == Asset.id, Review.review_type == 'asset')
+    result = db.session.execute(
+        db.update(Asset).values(
+            rating_count=db.select(db.func.count(Review.id)).where(asset_reviews).scalar_subquery(),
+            rating_avg=db.func.coalesce(
+                db.select(db.func.avg(Review.rating)).where(asset_reviews).scalar_subquery(), 0
+            ),
+            booking_count=db.select(db.func.count(Booking.id)).where(
+                Booking.asset_id == Asset.id, Booking.status != BookingStatus.CANCELLED
+            ).scalar_subquery(),
+            updated_at=Asset.updated_at
+        )
+    )
+    mark_rankings_changed(db.session)
+    db.session.commit()
+    click.echo(f'Recomputed rankings for {result.rowcount} assets')
+
+@assets_cli.command('import')
+@click.argument('source', type=click.File('rb'))
+@click.option('--owner', 'owner_email', required=True, help='Email of the owner the assets belong to.')
+@click.option('--format', 'import_format', type=click.Choice(['ndjson', 'csv']), default=None,
+              help='Input format; guessed from the file extension when omitted.')
+@click.option('--batch-size', default=500, show_default=True, help='Rows inserted per transaction.')
+def import_assets_command(source, owner_email, import_format, batch_size):
+    """Bulk-import assets from an NDJSON or CSV file ('-' reads stdin)"""
+    owner = User.query.filter_by(email=owner_email).first()
+    if not owner:
+        raise click.ClickException(f'No user with email {owner_email}')
+    if owner.user_type.value != 'owner':
+        raise click.ClickException('Only owners can create assets')
+    
+    if import_format is None:
+        import_format = 'csv' if source.name.lower().endswith('.csv') else 'ndjson'
+    rows = iter_csv_rows(source) if import_format == 'csv' else iter_ndjson_rows(source)
+    
+    report = import_assets(owner.id, rows, batch_size=batch_size)
+    click.echo(f"Created {report['created']} assets, {report['failed']} rows failed")
+    for error in report['errors']:
+        click.echo(f"  row {error['row']}: {error['error']}")
+    if report['errors_truncated']:
+        click.echo('  (further errors omitted)')
+
+@images_cli.command('generate-variants')
+@click.option('--force', is_flag=True, help='Regenerate derivatives that already exist.')
+@click.option('--batch-size', default=100, show_default=True, help='Images committed per transaction.')
+def generate_variants_command(force, batch_size):
+    """Create thumb/card/full derivatives for existing uploaded images"""
+    if not images_supported():
+        raise click.ClickException('Pillow is not installed; derivatives cannot be generated')
+    
+    processed = failed = 0
+    last_id = 0
+    while True:
+        query = AssetImage.query.filter(AssetImage.id > last_id)
+        if not force:
+            query = query.filter(AssetImage.variants.is_(None))
+        images = query.order_by(AssetImage.id).limit(batch_size).all()
+        if not images:
+            break
+        
+        for image in images:
+            last_id = image.id
+            try:
+                image.variants = generate_variants(asset_image_path(image.image_url))
+                processed += 1
+            except Exception as e:
+                failed += 1
+                click.echo(f'  image {image.id} ({image.image_url}): {e}')
+        db.session.commit()
+    
+    click.echo(f'Generated derivatives for {processed} images, {failed} failed')
+
+@images_cli.command('backfill-metadata')
+@click.option('--force', is_flag=True, help='Re-extract metadata that is already stored.')
+@click.option('--batch-size', default=200, show_default=True, help='Images committed per transaction.')
+def backfill_metadata_command(force, batch_size):
+    """Store width, height, byte size and placeholder for existing uploaded images"""
+    if not images_supported():
+        click.echo('Pillow is not installed; only byte sizes will be recorded')
+    
+    processed = failed = 0
+    last_id = 0
+    while True:
+        query = AssetImage.query.filter(AssetImage.id > last_id)
+        if not force:
+            query = query.filter(db.or_(AssetImage.byte_size.is_(None), AssetImage.placeholder.is_(None)))
+        images = query.order_by(AssetImage.id).limit(batch_size).all()
+        if not images:
+            break
+        
+        for image in images:
+            last_id = image.id
+            try:
+                image.set_metadata(extract_metadata(asset_image_path(image.image_url)))
+                processed += 1
+            except Exception as e:
+                failed += 1
+                click.echo(f'  image {image.id} ({image.image_url}): {e}')
+        db.session.commit()
+    
+    click.echo(f'Stored metadata for {processed} images, {failed} failed')
+
+@images_cli.command('process-pending')
+def process_pending_command():
+    """Process images left pending, e.g. after a restart interrupted the worker pool"""
+    image_ids = [row.id for row in AssetImage.query.with_entities(AssetImage.id).filter_by(processing_status='pending')]
+    for image_id in image_ids:
+        process_asset_image(image_id)
+    click.echo(f'Processed {len(image_ids)} pending images')
+
+@images_cli.command('shard-layout')
+@click.option('--batch-size', default=500, show_default=True, help='Image rows rewritten per transaction.')
+@click.option('--dry-run', is_flag=True, help='Report what would move without touching files or rows.')
+def shard_layout_command(batch_size, dry_run):
+    """Move flat uploads/assets files into ab/cd/ shards and rewrite image URLs.
+
+    Safe to interrupt and re-run: each file is moved with an atomic rename and
+    rows are rewritten in committed batches, so a rerun picks up where it stopped.
+    Old flat URLs keep resolving through the serving route in the meantime.
+    """
+    upload_dir = resolve_upload_folder(ASSET_UPLOAD_FOLDER)
+    moved = 0
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.startswith('.'):
+                continue
+            target = os.path.join(upload_dir, sharded_name(entry.name))
+            if not dry_run:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(entry.path, target)
+            moved += 1
+    click.echo(f"{'Would move' if dry_run else 'Moved'} {moved} files into shards")
+    
+    flat_images = AssetImage.query.filter(
+        AssetImage.image_url.startswith(ASSET_URL_PREFIX),
+        AssetImage.image_url.notlike(f'{ASSET_URL_PREFIX}%/%')
+    )
+    if dry_run:
+        click.echo(f'Would rewrite {flat_images.count()} image URLs')
+        return
+    
+    rewritten = 0
+    while True:
+        images = flat_images.order_by(AssetImage.id).limit(batch_size).all()
+        if not images:
+            break
+        for image in images:
+            image.image_url = ASSET_URL_PREFIX + sharded_name(relative_upload_path(image.image_url))
+        db.session.commit()
+        rewritten += len(images)
+    
+    db.session.execute(
+        db.update(ImageBlob)
+        .where(ImageBlob.filename.notlike('%/%'))
+        .values(filename=db.func.substr(ImageBlob.filename, 1, 2) + '/'
+                + db.func.substr(ImageBlob.filename, 3, 2) + '/' + ImageBlob.filename)
+    )
+    db.session.commit()
+    click.echo(f'Rewrote {rewritten} image URLs')
+
+@images_cli.command('gc')
+@click.option('--grace-hours', default=DEFAULT_GRACE_SECONDS / 3600, show_default=True,
+              help='Leave files modified more recently than this alone.')
+@click.option('--batch-size', default=SWEEP_BATCH_SIZE, show_default=True, help='Files checked per query.')
+@click.option('--dry-run', is_flag=True, help='List orphaned files without deleting them.')
+def gc_command(grace_hours, batch_size, dry_run):
+    """Delete uploaded files that no AssetImage refers to and expire idle upload sessions"""
+    scanned, orphans = sweep_orphaned_files(
+        grace_seconds=grace_hours * 3600, batch_size=batch_size, dry_run=dry_run
+    )
+    if dry_run:
+        for relative_path in orphans:
+            click.echo(f'  {relative_path}')
+    click.echo(f"Scanned {scanned} files, {'found' if dry_run else 'deleted'} {len(orphans)} orphans")
+    expired, parts = sweep_upload_sessions(grace_seconds=grace_hours * 3600, dry_run=dry_run)
+    click.echo(f"{'Found' if dry_run else 'Expired'} {expired} idle upload sessions, "
+               f"{'found' if dry_run else 'deleted'} {parts} partial upload files")
+
+def _count_overlaps(asset_id):
+    """Pairs of active bookings of the asset whose date ranges overlap"""
+    other = db.aliased(Booking)
+    return db.session.query(db.func.count()).select_from(Booking).join(other, db.and_(
+        other.asset_id == Booking.asset_id,
+        other.id > Booking.id,
+        other.status.in_(ACTIVE_BOOKING_STATUSES),
+        other.start_date < Booking.end_date,
+        other.end_date > Booking.start_date
+    )).filter(Booking.asset_id == asset_id, Booking.status.in_(ACTIVE_BOOKING_STATUSES)).scalar()
+
+@bookings_cli.command('stress-test')
+@click.option('--threads', default=16, show_default=True, help='Concurrent clients booking the same asset.')
+@click.option('--attempts', default=50, show_default=True, help='Booking attempts per thread.')
+@click.option('--days', default=90, show_default=True, help='Width of the date window the requests fall in.')
+@click.option('--seed', default=None, type=int, help='Random seed for reproducible runs.')
+def stress_test_command(threads, attempts, days, seed):
+    """Hammer one asset with concurrent reservations in a scratch database.
+    
+    Runs against a temporary SQLite file, never the configured database, and
+    fails if any two active bookings overlap.
+    """
+    from app import create_app
+    from app.config import Config
+    
+    scratch_dir = tempfile.mkdtemp(prefix='booking-stress-')
+    
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(scratch_dir, 'stress.db')}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+        ASSET_CACHE_ENABLED = False
+        IMAGE_WORKERS = 1
+    
+    stress_app = create_app(StressConfig)
+    rng = random.Random(seed)
+    window_start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    plans = [
+        [(offset, rng.randint(1, 5)) for offset in (rng.randrange(days) for _ in range(attempts))]
+        for _ in range(threads)
+    ]
+    outcomes = {'booked': 0, 'conflicts': 0, 'errors': 0}
+    latencies = []
+    lock = threading.Lock()
+    
+    try:
+        with stress_app.app_context():
+            db.create_all()
+            owner = User(email='owner@stress.test', first_name='Stress', last_name='Owner', user_type=UserType.OWNER)
+            client = User(email='client@stress.test', first_name='Stress', last_name='Client', user_type=UserType.CLIENT)
+            owner.set_password('stress')
+            client.set_password('stress')
+            db.session.add_all([owner, client])
+            db.session.flush()
+            asset = Asset(owner_id=owner.id, title='Stress yacht', asset_type=AssetType.YACHT,
+                          price_per_day=1000, location='Stress harbour', is_available=True)
+            db.session.add(asset)
+            db.session.commit()
+            asset_id, client_id = asset.id, client.id
+        
+        def worker(plan):
+            with stress_app.app_context():
+                for offset, length in plan:
+                    start_date = window_start + timedelta(days=offset)
+                    started = time.perf_counter()
+                    try:
+                        reserve_asset(db.session.get(Asset, asset_id), client_id,
+                                      start_date, start_date + timedelta(days=length))
+                        outcome = 'booked'
+                    except BookingConflict:
+                        outcome = 'conflicts'
+                    except Exception as e:
+                        outcome = 'errors'
+                        click.echo(f'  {type(e).__name__}: {e}')
+                    with lock:
+                        outcomes[outcome] += 1
+                        latencies.append(time.perf_counter() - started)
+        
+        workers = [threading.Thread(target=worker, args=(plan,)) for plan in plans]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        with stress_app.app_context():
+            overlaps = _count_overlaps(asset_id)
+            db.engine.dispose()
+    finally:
+        stress_app.extensions['image_worker'].shutdown()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    
+    total = threads * attempts
+    latencies.sort()
+    click.echo(f"{total} attempts from {threads} threads in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    click.echo(f"booked={outcomes['booked']} conflicts={outcomes['conflicts']} errors={outcomes['errors']}")
+    click.echo(f"latency p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+               f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+    click.echo(f'overlapping bookings: {overlaps}')
+    if overlaps:
+        raise click.ClickException('Double bookings detected')
+
+@bookings_cli.command('maintain')
+@click.option('--batch-size', default=MAINTENANCE_BATCH_SIZE, show_default=True, help='Bookings changed per transaction.')
+@click.option('--interval', default=None, type=int,
+              help='Keep running, repeating every this many seconds (for use as a scheduler process).')
+def maintain_command(batch_size, interval):
+    """Expire stale pending bookings and complete bookings that have ended"""
+    while True:
+        started = time.perf_counter()
+        counts = run_booking_maintenance(batch_size=batch_size)
+        click.echo(f"[{datetime.now().isoformat(timespec='seconds')}] expired={counts['expired']} "
+                   f"completed={counts['completed']} in {time.perf_counter() - started:.2f}s")
+        if not interval:
+            break
+        db.session.remove()
+        time.sleep(interval)
+
+def register_commands(app):
+    """Attach the maintenance CLI groups to the app"""
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(bookings_cli)
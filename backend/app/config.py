@@ -24,4 +24,34 @@ class Config:
     
     # File upload configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    UPLOAD_FOLDER = 'uploads'
\ No newline at end of file
+    UPLOAD_FOLDER = 'uploads'
+    
+    # Resumable upload sessions (/api/uploads): whole-file and per-request chunk limits
+    UPLOAD_SESSION_MAX_SIZE = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024  # must stay below MAX_CONTENT_LENGTH
+    # Idle sessions expire this long after their last chunk (seconds)
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 60 * 60))
+    
+    # Hand /uploads bytes to the front proxy: None, 'x-accel' (nginx) or 'x-sendfile'
+    UPLOAD_OFFLOAD = os.environ.get('UPLOAD_OFFLOAD') or None
+    # nginx 'internal' location aliased to backend/uploads/assets
+    UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/assets')
+    
+    # In-process caches follow writes made by other workers and CLI commands through the
+    # shared cache_versions table, re-read at most this often (seconds)
+    CACHE_SYNC_INTERVAL = float(os.environ.get('CACHE_SYNC_INTERVAL', 1.0))
+    
+    # Catalog listing cache (per process, invalidated on every asset write in any process)
+    ASSET_CACHE_ENABLED = os.environ.get('ASSET_CACHE_ENABLED', 'true').lower() == 'true'
+    ASSET_CACHE_MAX_ENTRIES = 512
+    ASSET_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 32MB of serialized responses
+    
+    # Per-asset booking occupancy behind the availability calendar
+    AVAILABILITY_CACHE_MAX_ENTRIES = 4096
+    
+    # Compiled per-asset price calendars behind quotes and booking totals
+    PRICING_CACHE_MAX_ENTRIES = 4096
+    
+    # Background image processing pool
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    IMAGE_QUEUE_MAX = int(os.environ.get('IMAGE_QUEUE_MAX', 64))
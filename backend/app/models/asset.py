@@ -1,5 +1,7 @@
 from datetime import datetime
+from sqlalchemy import event
 from app import db
+from app.utils.file_upload import relative_upload_path
 import enum
 
 class AssetType(enum.Enum):
@@ -28,34 +30,56 @@ class Asset(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Denormalized ranking columns, maintained incrementally by review/booking insert events
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    booking_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_assets_available_price', 'is_available', 'price_per_day', 'id'),
+        db.Index('ix_assets_available_rating', 'is_available', 'rating_avg', 'id'),
+        db.Index('ix_assets_available_popularity', 'is_available', 'booking_count', 'id'),
+        db.Index('ix_assets_available_created', 'is_available', 'created_at', 'id'),
+    )
+    
     # Relationships - FIXED
     owner = db.relationship("User", backref="owned_assets")
-    images = db.relationship("AssetImage", back_populates="asset", cascade="all, delete-orphan", lazy='joined', order_by="desc(AssetImage.is_primary)")
+    images = db.relationship("AssetImage", back_populates="asset", cascade="all, delete-orphan", lazy='selectin', order_by="desc(AssetImage.is_primary)")
     
-    def to_dict(self):
-        """Convert asset object to dictionary"""
-        # Sort images to ensure primary image is first, then by ID for consistent order
-        sorted_images = sorted(self.images, key=lambda x: (not x.is_primary, x.id))
+    # Fields accepted by to_dict(fields=...); 'primary_image' is a single image or None
+    SERIALIZABLE_FIELDS = (
+        'id', 'owner_id', 'title', 'description', 'asset_type', 'brand', 'model', 'year',
+        'capacity', 'price_per_day', 'location', 'latitude', 'longitude', 'is_available',
+        'created_at', 'updated_at', 'rating_avg', 'rating_count', 'booking_count',
+        'images', 'primary_image'
+    )
+    # Lightweight projection used by catalog listing cards
+    CARD_FIELDS = ('id', 'title', 'asset_type', 'price_per_day', 'location', 'capacity', 'primary_image')
+    
+    def to_dict(self, fields=None, primary_image=None):
+        """Convert asset object to dictionary, optionally limited to the given fields"""
+        if fields is None:
+            fields = self.SERIALIZABLE_FIELDS[:-1]
         
-        return {
-            'id': self.id,
-            'owner_id': self.owner_id,
-            'title': self.title,
-            'description': self.description,
-            'asset_type': self.asset_type.value if self.asset_type else None,
-            'brand': self.brand,
-            'model': self.model,
-            'year': self.year,
-            'capacity': self.capacity,
-            'price_per_day': self.price_per_day,
-            'location': self.location,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'is_available': self.is_available,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'images': [img.to_dict() for img in sorted_images]
-        }
+        asset_dict = {}
+        for field in fields:
+            if field == 'images':
+                # Sort images to ensure primary image is first, then by ID for consistent order
+                sorted_images = sorted(self.images, key=lambda x: (not x.is_primary, x.id))
+                asset_dict['images'] = [img.to_dict() for img in sorted_images]
+            elif field == 'primary_image':
+                if primary_image is None and self.images:
+                    primary_image = min(self.images, key=lambda x: (not x.is_primary, x.id))
+                asset_dict['primary_image'] = primary_image.to_dict() if primary_image else None
+            elif field == 'asset_type':
+                asset_dict['asset_type'] = self.asset_type.value if self.asset_type else None
+            elif field in ('created_at', 'updated_at'):
+                value = getattr(self, field)
+                asset_dict[field] = value.isoformat() if value else None
+            else:
+                asset_dict[field] = getattr(self, field)
+        
+        return asset_dict
     
     def __repr__(self):
         return f'<Asset {self.title}>'
@@ -67,17 +91,92 @@ class AssetImage(db.Model):
     asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False)
     image_url = db.Column(db.String(200), nullable=False)
     is_primary = db.Column(db.Boolean, default=False)
+    # SHA-256 of the stored file for content-addressed uploads (None for legacy uuid names)
+    content_hash = db.Column(db.String(64), db.ForeignKey('image_blobs.digest'), index=True)
+    # Resized derivatives stored next to the original: {'thumb': filename, 'card': ..., 'full': ...}
+    variants = db.Column(db.JSON)
+    # Extracted by the background worker so clients can reserve layout space and show a placeholder
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    byte_size = db.Column(db.Integer)
+    placeholder = db.Column(db.Text)  # tiny base64 WebP data URI (LQIP)
+    # 'pending' until the background worker has produced the derivatives, then 'ready' or 'failed'
+    processing_status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
     
     # Relationships - FIXED
     asset = db.relationship("Asset", back_populates="images")
     
+    METADATA_FIELDS = ('width', 'height', 'byte_size', 'placeholder')
+    
+    def set_metadata(self, metadata):
+        for field in self.METADATA_FIELDS:
+            if field in metadata:
+                setattr(self, field, metadata[field])
+    
+    def variant_urls(self):
+        """URLs of the stored derivatives, keyed by variant name"""
+        base_url = self.image_url.rsplit('/', 1)[0]
+        return {name: f'{base_url}/{filename}' for name, filename in (self.variants or {}).items()}
+    
     def to_dict(self):
         return {
             'id': self.id,
             'asset_id': self.asset_id,
             'image_url': self.image_url,
-            'is_primary': self.is_primary
+            'is_primary': self.is_primary,
+            'variants': self.variant_urls(),
+            'width': self.width,
+            'height': self.height,
+            'byte_size': self.byte_size,
+            'placeholder': self.placeholder,
+            'processing_status': self.processing_status
         }
     
     def __repr__(self):
-        return f'<AssetImage {self.image_url}>'
\ No newline at end of file
+        return f'<AssetImage {self.image_url}>'
+
+class ImageBlob(db.Model):
+    """A stored upload file, shared by every AssetImage with the same content"""
+    __tablename__ = 'image_blobs'
+    
+    digest = db.Column(db.String(64), primary_key=True)
+    filename = db.Column(db.String(100), nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ImageBlob {self.filename} refs={self.ref_count}>'
+
+@event.listens_for(AssetImage, 'before_insert')
+def _reference_blob(mapper, connection, target):
+    """Count a new reference to the image's blob, registering the blob on first use"""
+    if not target.content_hash:
+        return
+    
+    now = datetime.utcnow()
+    result = connection.execute(
+        db.update(ImageBlob)
+        .where(ImageBlob.digest == target.content_hash)
+        .values(ref_count=ImageBlob.ref_count + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(db.insert(ImageBlob).values(
+            digest=target.content_hash,
+            filename=relative_upload_path(target.image_url),
+            ref_count=1,
+            created_at=now,
+            updated_at=now
+        ))
+
+@event.listens_for(AssetImage, 'after_delete')
+def _release_blob(mapper, connection, target):
+    """Drop the image's reference; blobs at zero references are left for garbage collection"""
+    if not target.content_hash:
+        return
+    
+    connection.execute(
+        db.update(ImageBlob)
+        .where(ImageBlob.digest == target.content_hash)
+        .values(ref_count=ImageBlob.ref_count - 1, updated_at=datetime.utcnow())
+    )
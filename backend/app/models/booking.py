@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
 from app import db
 import enum
 
@@ -8,8 +10,27 @@ class BookingStatus(enum.Enum):
     CANCELLED = "cancelled"
     COMPLETED = "completed"
 
+# Bookings in these states hold the asset for their date range
+ACTIVE_BOOKING_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.PENDING)
+
+# Allowed status changes: current status -> statuses the owner/client may move it to
+OWNER_TRANSITIONS = {
+    BookingStatus.PENDING: (BookingStatus.CONFIRMED, BookingStatus.CANCELLED),
+    BookingStatus.CONFIRMED: (BookingStatus.COMPLETED,),
+}
+CLIENT_TRANSITIONS = {
+    BookingStatus.PENDING: (BookingStatus.CANCELLED,),
+    BookingStatus.CONFIRMED: (BookingStatus.CANCELLED,),
+}
+
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        db.Index('ix_bookings_asset_status_dates', 'asset_id', 'status', 'start_date', 'end_date'),
+        # Newest-first keyset pages of a user's bookings as client and as owner
+        db.Index('ix_bookings_client_id_id', 'client_id', 'id'),
+        db.Index('ix_bookings_owner_id_id', 'owner_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -68,6 +89,42 @@ class Booking(db.Model):
         
         return booking_dict
     
+    @classmethod
+    def conflicts_with(cls, start_date, end_date):
+        """SQL criterion matching active bookings that overlap [start_date, end_date)"""
+        return db.and_(
+            cls.status.in_(ACTIVE_BOOKING_STATUSES),
+            cls.start_date < end_date,
+            cls.end_date > start_date
+        )
+    
+    def transition_error(self, user_id, new_status):
+        """Why user_id may not move this booking to new_status as (message, http_status), or None"""
+        if user_id == self.owner_id:
+            if new_status in OWNER_TRANSITIONS.get(self.status, ()):
+                return None
+            return 'Invalid status transition', 400
+        if user_id == self.client_id:
+            if new_status in CLIENT_TRANSITIONS.get(self.status, ()):
+                return None
+            return 'Clients can only cancel bookings', 400
+        return 'You can only update your own bookings', 403
+    
+    @staticmethod
+    def lock_asset(asset_id):
+        """Hold the asset's write lock until the current transaction ends.
+        
+        A no-op UPDATE of the asset row takes a row lock on PostgreSQL/MySQL and
+        the database write lock on SQLite, so reservations of the same asset run
+        their conflict check and insert one at a time.
+        """
+        from app.models.asset import Asset
+        
+        result = db.session.execute(
+            db.update(Asset).where(Asset.id == asset_id).values(updated_at=Asset.updated_at)
+        )
+        return result.rowcount > 0
+    
     def calculate_total_days(self):
         """Calculate total days for the booking"""
         if self.start_date and self.end_date:
@@ -75,4 +132,48 @@ class Booking(db.Model):
         return 0
     
     def __repr__(self):
-        return f'<Booking {self.id} - {self.status.value}>'
\ No newline at end of file
+        return f'<Booking {self.id} - {self.status.value}>'
+
+def adjust_booking_counts(connection, asset_counts):
+    """Add asset_counts ({asset_id: delta}) to Asset.booking_count, for writes that bypass the ORM hooks"""
+    from app.models.asset import Asset
+    
+    for asset_id, delta in asset_counts.items():
+        if delta:
+            connection.execute(
+                db.update(Asset)
+                .where(Asset.id == asset_id)
+                .values(booking_count=Asset.booking_count + delta, updated_at=Asset.updated_at)
+            )
+
+# Asset.booking_count (the popularity ranking) counts every booking that was not cancelled
+@event.listens_for(Booking, 'after_insert')
+def _increment_booking_count(mapper, connection, target):
+    """Keep Asset.booking_count current without a recount"""
+    from app.utils.catalog_cache import mark_rankings_changed
+    
+    if target.status == BookingStatus.CANCELLED:
+        return
+    adjust_booking_counts(connection, {target.asset_id: 1})
+    mark_rankings_changed(object_session(target))
+
+@event.listens_for(Booking, 'after_update')
+def _release_cancelled_booking(mapper, connection, target):
+    from app.utils.catalog_cache import mark_rankings_changed
+    
+    history = inspect(target).attrs.status.history
+    if not history.has_changes() or target.status != BookingStatus.CANCELLED:
+        return
+    if BookingStatus.CANCELLED in history.deleted:
+        return
+    adjust_booking_counts(connection, {target.asset_id: -1})
+    mark_rankings_changed(object_session(target))
+
+@event.listens_for(Booking, 'after_delete')
+def _release_deleted_booking(mapper, connection, target):
+    from app.utils.catalog_cache import mark_rankings_changed
+    
+    if target.status == BookingStatus.CANCELLED:
+        return
+    adjust_booking_counts(connection, {target.asset_id: -1})
+    mark_rankings_changed(object_session(target))
@@ -0,0 +1,13 @@
+from datetime import datetime
+from app import db
+
+class CacheVersion(db.Model):
+    """Change counter of a family of cached data, shared by every app process (see app.utils.cache_sync)"""
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
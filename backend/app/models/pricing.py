@@ -0,0 +1,55 @@
+from datetime import datetime
+from app import db
+import enum
+
+class PriceRuleType(enum.Enum):
+    WEEKEND = "weekend"    # Saturdays and Sundays, optionally within start_date/end_date
+    SEASON = "season"      # Every day from start_date to end_date
+    MIN_STAY = "min_stay"  # Minimum booking length for arrivals within the dates
+
+# Weekday numbers (date.weekday()) priced by WEEKEND rules
+WEEKEND_DAYS = (5, 6)
+
+class PriceRule(db.Model):
+    """Per-day pricing rule of an asset; compiled into a cached price calendar by app.utils.pricing"""
+    __tablename__ = 'price_rules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False, index=True)
+    rule_type = db.Column(db.Enum(PriceRuleType), nullable=False)
+    # Inclusive day bounds; open-ended when None
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    # Price rules set either a fixed daily price or a multiplier of the asset's price_per_day
+    price_per_day = db.Column(db.Float)
+    multiplier = db.Column(db.Float)
+    min_days = db.Column(db.Integer)
+    # Where price rules overlap, the higher priority (then the newer rule) wins
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    asset = db.relationship("Asset", backref=db.backref("price_rules", cascade="all, delete-orphan"))
+    
+    def daily_price(self, base_price):
+        if self.price_per_day is not None:
+            return self.price_per_day
+        return base_price * (self.multiplier if self.multiplier is not None else 1.0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'asset_id': self.asset_id,
+            'rule_type': self.rule_type.value if self.rule_type else None,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'price_per_day': self.price_per_day,
+            'multiplier': self.multiplier,
+            'min_days': self.min_days,
+            'priority': self.priority,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<PriceRule {self.rule_type.value if self.rule_type else None} asset={self.asset_id}>'
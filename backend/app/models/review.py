@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
 from app import db
 
 class Review(db.Model):
@@ -58,4 +60,24 @@ class Review(db.Model):
         return review_dict
     
     def __repr__(self):
-        return f'<Review {self.id} - {self.rating} stars>'
\ No newline at end of file
+        return f'<Review {self.id} - {self.rating} stars>'
+
+@event.listens_for(Review, 'after_insert')
+def _update_asset_rating(mapper, connection, target):
+    """Fold a new asset review into Asset.rating_avg/rating_count in a single UPDATE"""
+    if target.review_type != 'asset':
+        return
+    
+    from app.models.asset import Asset
+    from app.utils.catalog_cache import mark_rankings_changed
+    
+    connection.execute(
+        db.update(Asset)
+        .where(Asset.id == target.asset_id)
+        .values(
+            rating_avg=(Asset.rating_avg * Asset.rating_count + target.rating) / (Asset.rating_count + 1),
+            rating_count=Asset.rating_count + 1,
+            updated_at=Asset.updated_at
+        )
+    )
+    mark_rankings_changed(object_session(target))
@@ -0,0 +1,49 @@
+from datetime import datetime
+import uuid
+from app import db
+
+class UploadSession(db.Model):
+    """A resumable image upload, written chunk by chunk and attached to an asset on completion"""
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    asset_id = db.Column(db.Integer, db.ForeignKey('assets.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255))  # Client-side name, informational only
+    total_size = db.Column(db.Integer, nullable=False)
+    received_size = db.Column(db.Integer, nullable=False, default=0)
+    is_primary = db.Column(db.Boolean, default=False)
+    # 'open' while chunks are accepted, 'completing' while one request stores the file,
+    # then 'complete', 'aborted' or 'expired'
+    status = db.Column(db.String(20), nullable=False, default='open')
+    # Pushed forward by every chunk; `flask images gc` expires open sessions past it
+    expires_at = db.Column(db.DateTime, index=True)
+    # Held by the request writing the chunk at received_size, so writers never overlap
+    chunk_lease_until = db.Column(db.DateTime)
+    image_id = db.Column(db.Integer, db.ForeignKey('asset_images.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    image = db.relationship("AssetImage")
+    asset = db.relationship("Asset", backref=db.backref("upload_sessions", cascade="all, delete-orphan"))
+    
+    def is_expired(self, now=None):
+        return self.expires_at is not None and self.expires_at <= (now or datetime.utcnow())
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'asset_id': self.asset_id,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'received_size': self.received_size,
+            'is_primary': self.is_primary,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'image': self.image.to_dict() if self.image else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received_size}/{self.total_size}>'
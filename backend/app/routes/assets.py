@@ -1,57 +1,393 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.asset import Asset, AssetType, AssetImage
 from app.models.user import User
-from app.utils.file_upload import save_uploaded_file
+from app.models.booking import Booking
+from app.models.pricing import PriceRule
+from app.utils.dates import parse_iso_datetime
+from app.utils.file_upload import save_uploaded_file, content_hash_from_filename
+from app.utils.image_processing import images_supported
+from app.utils.image_worker import enqueue_image_processing, get_image_worker
+from app.utils.asset_import import parse_asset_fields, iter_ndjson_rows, iter_csv_rows, import_assets
+from app.utils.pagination import parse_limit, encode_cursor, decode_cursor, keyset_filter
+from app.utils.search import apply_text_search
+from app.utils.catalog_cache import get_catalog_cache, mark_catalog_changed
+from app.utils.pricing import mark_pricing_changed, parse_price_rule
+from app.utils.geo import MAX_RADIUS_KM, apply_bbox_filter, apply_radius_filter, distance_expression, parse_bbox
+from datetime import datetime
 import os
 
 assets_bp = Blueprint('assets', __name__)
 
 UPLOAD_FOLDER = 'uploads/assets'
 
+MAX_BULK_UPDATE_IDS = 1000
+
+# Sort orders backed by indexed Asset columns: name -> (column, descending)
+COLUMN_SORTS = {
+    'price': (Asset.price_per_day, False),
+    'price_desc': (Asset.price_per_day, True),
+    'rating': (Asset.rating_avg, True),
+    'popularity': (Asset.booking_count, True),
+    'newest': (Asset.created_at, True),
+}
+
+# Counters kept current by booking and review writes, and the sorts built on them
+RANKING_FIELDS = ('rating_avg', 'rating_count', 'booking_count')
+RANKING_SORTS = ('rating', 'popularity')
+
+# Lower bounds of the price-per-day facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0, 500, 1000, 2500, 5000, 10000, 25000)
+
+def _is_truthy(value):
+    return value is not None and value.lower() in ('1', 'true', 'yes')
+
+def _apply_asset_filters(query, args):
+    """Apply the public catalog filters from the query string to an Asset query"""
+    asset_type = args.get('type')
+    location = args.get('location')
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    
+    query = query.filter(Asset.is_available == True)
+    
+    if asset_type:
+        try:
+            query = query.filter(Asset.asset_type == AssetType(asset_type))
+        except ValueError:
+            raise ValueError('Invalid asset type')
+    
+    if location:
+        query = query.filter(Asset.location.ilike(f'%{location}%'))
+    
+    if min_price is not None:
+        query = query.filter(Asset.price_per_day >= min_price)
+    
+    if max_price is not None:
+        query = query.filter(Asset.price_per_day <= max_price)
+    
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    if start_date or end_date:
+        if not (start_date and end_date):
+            raise ValueError('start_date and end_date must be given together')
+        try:
+            start_date = parse_iso_datetime(start_date)
+            end_date = parse_iso_datetime(end_date)
+        except ValueError:
+            raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)')
+        if start_date >= end_date:
+            raise ValueError('End date must be after start date')
+        # Anti-join: drop assets holding an overlapping pending/confirmed booking
+        query = query.filter(~db.exists().where(
+            Booking.asset_id == Asset.id,
+            Booking.conflicts_with(start_date, end_date)
+        ))
+    
+    return query
+
+def _apply_geo_search(query, args):
+    """Apply lat/lng/radius_km or bbox filters, returning (query, distance expression or None)"""
+    lat = args.get('lat', type=float)
+    lng = args.get('lng', type=float)
+    radius_km = args.get('radius_km', type=float)
+    bbox = args.get('bbox')
+    
+    if (lat is None) != (lng is None):
+        raise ValueError('lat and lng must be given together')
+    if lat is not None and not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('lat/lng are out of range')
+    
+    if bbox:
+        query = apply_bbox_filter(query, *parse_bbox(bbox))
+    
+    if radius_km is not None:
+        if lat is None:
+            raise ValueError('radius_km requires lat and lng')
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValueError(f'radius_km must be between 0 and {MAX_RADIUS_KM}')
+        return apply_radius_filter(query, lat, lng, radius_km)
+    
+    if lat is not None:
+        return query.filter(Asset.latitude.isnot(None), Asset.longitude.isnot(None)), distance_expression(lat, lng)
+    
+    return query, None
+
+def _resolve_fields(args):
+    """Return the requested field list from fields=/view=, or None for the full representation"""
+    fields = args.get('fields')
+    if fields:
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+        invalid = [field for field in fields if field not in Asset.SERIALIZABLE_FIELDS]
+        if invalid:
+            raise ValueError(f'Invalid fields: {", ".join(invalid)}')
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        return fields
+    
+    view = args.get('view', 'full')
+    if view == 'card':
+        return list(Asset.CARD_FIELDS)
+    if view != 'full':
+        raise ValueError(f'Invalid view: {view}')
+    return None
+
+def _uses_rankings(args):
+    """Whether a listing response sorts by or shows the ranking counters"""
+    if args.get('sort') in RANKING_SORTS:
+        return True
+    try:
+        fields = _resolve_fields(args)
+    except ValueError:
+        return False  # Rejected with a 400, never cached
+    return fields is None or any(field in RANKING_FIELDS for field in fields)
+
+def _projection_options(fields):
+    """Loader options that select only the columns and images needed for the given fields"""
+    if fields is None:
+        return [db.selectinload(Asset.images)]
+    
+    columns = [getattr(Asset, field) for field in fields if field not in ('images', 'primary_image')]
+    options = [db.load_only(*columns)]
+    if 'images' in fields:
+        options.append(db.selectinload(Asset.images))
+    else:
+        # primary_image is fetched separately by _load_primary_images
+        options.append(db.noload(Asset.images))
+    return options
+
+def _load_primary_images(asset_ids):
+    """Fetch only the primary (or first) image of each asset, keyed by asset id"""
+    if not asset_ids:
+        return {}
+    
+    ranked = db.select(
+        AssetImage.id,
+        db.func.row_number().over(
+            partition_by=AssetImage.asset_id,
+            order_by=(AssetImage.is_primary.desc(), AssetImage.id)
+        ).label('position')
+    ).where(AssetImage.asset_id.in_(asset_ids)).subquery()
+    
+    images = AssetImage.query.join(ranked, ranked.c.id == AssetImage.id).filter(ranked.c.position == 1).all()
+    return {image.asset_id: image for image in images}
+
+def _serialize_assets(assets, fields):
+    """Serialize assets for a listing response, honouring a sparse field list"""
+    if fields is None:
+        return [asset.to_dict() for asset in assets]
+    
+    primary_images = {}
+    if 'primary_image' in fields and 'images' not in fields:
+        primary_images = _load_primary_images([asset.id for asset in assets])
+    return [asset.to_dict(fields, primary_image=primary_images.get(asset.id)) for asset in assets]
+
+def _query_assets(args):
+    """Run the catalog listing query; raises ValueError for invalid parameters"""
+    query = _apply_asset_filters(Asset.query, args)
+    query, distance = _apply_geo_search(query, args)
+    fields = _resolve_fields(args)
+    
+    # Full-text search over title, description, brand, model and location
+    rank = None
+    text_query = args.get('q', '').strip()
+    if text_query:
+        query, rank = apply_text_search(query, text_query)
+    
+    # Computed values selected alongside each asset: name -> (expression, sort descending)
+    computed = {}
+    if rank is not None:
+        computed['relevance'] = (rank, False)
+    if distance is not None:
+        computed['distance'] = (distance, False)
+    
+    sort_name = args.get('sort') or ('relevance' if rank is not None else 'id')
+    if sort_name in COLUMN_SORTS:
+        # Selected as well, so the cursor value never needs an unloaded attribute
+        computed[sort_name] = COLUMN_SORTS[sort_name]
+    if sort_name == 'id':
+        sort_expr, descending = None, False
+    elif sort_name in computed:
+        sort_expr, descending = computed[sort_name]
+    else:
+        raise ValueError(f'Invalid sort: {sort_name}')
+    
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    paginate = limit is not None or cursor is not None
+    
+    response = {}
+    if _is_truthy(args.get('include_total')):
+        response['total'] = query.with_entities(db.func.count(Asset.id)).scalar()
+    
+    query = query.options(*_projection_options(fields))
+    computed_names = list(computed)
+    if computed_names:
+        query = query.add_columns(*[computed[name][0] for name in computed_names])
+    
+    # created_at may be NULL on old rows: keep those at the end so the cursor can step through them
+    nulls_last = sort_name in COLUMN_SORTS and sort_expr.expression.nullable
+    id_order = Asset.id.desc() if descending else Asset.id
+    if sort_expr is not None:
+        sort_order = sort_expr.desc() if descending else sort_expr.asc()
+        query = query.order_by(sort_order.nulls_last() if nulls_last else sort_order, id_order)
+    else:
+        query = query.order_by(id_order)
+    
+    if paginate:
+        limit = parse_limit(limit)
+        if cursor:
+            cursor_sort, last_value, last_id = decode_cursor(cursor)
+            if cursor_sort != sort_name:
+                raise ValueError('Cursor does not match the requested sort order')
+            if sort_name == 'newest' and last_value is not None:
+                try:
+                    last_value = datetime.fromisoformat(last_value)
+                except (TypeError, ValueError):
+                    raise ValueError('Invalid cursor')
+            query = query.filter(keyset_filter(Asset.id, last_id, sort_expr, last_value, descending, nulls_last))
+        # Fetch one extra row to know whether another page exists
+        query = query.limit(limit + 1)
+    
+    rows = query.all()
+    if computed_names:
+        rows = [(row[0], dict(zip(computed_names, row[1:]))) for row in rows]
+    else:
+        rows = [(asset, {}) for asset in rows]
+    
+    print(f"[GET ASSETS] Found {len(rows)} available assets")
+    
+    if paginate:
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            last_asset, last_values = rows[-1]
+            last_value = last_values.get(sort_name)
+            if isinstance(last_value, datetime):
+                last_value = last_value.isoformat()
+            next_cursor = encode_cursor(sort_name, last_value, last_asset.id)
+        else:
+            next_cursor = None
+        response.update({'has_more': has_more, 'next_cursor': next_cursor})
+    
+    assets = _serialize_assets([asset for asset, _ in rows], fields)
+    for asset_dict, (_, values) in zip(assets, rows):
+        if 'distance' in values:
+            asset_dict['distance_km'] = round(values['distance'], 3)
+    
+    response.update({
+        'assets': assets,
+        'count': len(assets)
+    })
+    return response
+
+def _json_body_response(body, cache_status):
+    response = current_app.response_class(body, mimetype='application/json')
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def _cached_json(scope, builder, ranking=False):
+    """Serve a JSON GET response from the catalog cache, building and storing it on a miss"""
+    cache = get_catalog_cache()
+    cache_key = cache.make_key(scope, request.args, availability='start_date' in request.args, ranking=ranking)
+    body = cache.get(cache_key)
+    if body is not None:
+        return _json_body_response(body, 'HIT'), 200
+    
+    try:
+        response = builder(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    body = current_app.json.dumps(response) + '\n'
+    cache.set(cache_key, body)
+    return _json_body_response(body, 'MISS'), 200
+
 @assets_bp.route('/', methods=['GET'])
 def get_assets():
-    """Get all available assets with optional filtering"""
+    """Get available assets with optional filtering, text/geo search and keyset pagination"""
     try:
-        asset_type = request.args.get('type')
-        location = request.args.get('location')
-        min_price = request.args.get('min_price', type=float)
-        max_price = request.args.get('max_price', type=float)
-        
-        query = Asset.query.options(db.joinedload(Asset.images)).filter_by(is_available=True)
-        
-        if asset_type:
-            try:
-                asset_type_enum = AssetType(asset_type)
-                query = query.filter_by(asset_type=asset_type_enum)
-            except ValueError:
-                return jsonify({'error': 'Invalid asset type'}), 400
-        
-        if location:
-            query = query.filter(Asset.location.ilike(f'%{location}%'))
-        
-        if min_price:
-            query = query.filter(Asset.price_per_day >= min_price)
-        
-        if max_price:
-            query = query.filter(Asset.price_per_day <= max_price)
-        
-        assets = query.all()
-        
-        print(f"[GET ASSETS] Found {len(assets)} available assets")
-        for asset in assets:
-            print(f"  - Asset {asset.id}: {asset.title} (available: {asset.is_available})")
-        
-        return jsonify({
-            'assets': [asset.to_dict() for asset in assets],
-            'count': len(assets)
-        }), 200
-        
+        return _cached_json('assets', _query_assets, ranking=_uses_rankings(request.args))
     except Exception as e:
         print(f"Error in get_assets: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _query_facets(args):
+    """Compute facet counts for the current filter set in a single grouped query"""
+    query = _apply_asset_filters(Asset.query, args)
+    query, _ = _apply_geo_search(query, args)
+    text_query = args.get('q', '').strip()
+    if text_query:
+        query, _ = apply_text_search(query, text_query)
+    
+    # Bucket index: 0 for the first range up to len(PRICE_BUCKETS) - 1 for the open-ended last one
+    bucket = db.case(
+        *[(Asset.price_per_day < upper, index) for index, upper in enumerate(PRICE_BUCKETS[1:])],
+        else_=len(PRICE_BUCKETS) - 1
+    )
+    rows = query.with_entities(
+        Asset.asset_type,
+        bucket,
+        db.func.count(Asset.id),
+        db.func.min(Asset.capacity),
+        db.func.max(Asset.capacity),
+        db.func.min(Asset.price_per_day),
+        db.func.max(Asset.price_per_day)
+    ).group_by(Asset.asset_type, bucket).all()
+    
+    # The grouped rows are few (types x buckets), so the facets are folded together here
+    type_counts = {asset_type.value: 0 for asset_type in AssetType}
+    bucket_counts = [0] * len(PRICE_BUCKETS)
+    capacity_values, price_values = [], []
+    total = 0
+    for asset_type, bucket_index, count, min_cap, max_cap, min_price, max_price in rows:
+        type_counts[asset_type.value] += count
+        bucket_counts[bucket_index] += count
+        total += count
+        capacity_values.extend(value for value in (min_cap, max_cap) if value is not None)
+        price_values.extend((min_price, max_price))
+    
+    price_buckets = []
+    for index, lower in enumerate(PRICE_BUCKETS):
+        upper = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+        price_buckets.append({'min': lower, 'max': upper, 'count': bucket_counts[index]})
+    
+    return {
+        'total': total,
+        'facets': {
+            'asset_type': type_counts,
+            'price': price_buckets,
+            'price_range': {
+                'min': min(price_values) if price_values else None,
+                'max': max(price_values) if price_values else None
+            },
+            'capacity': {
+                'min': min(capacity_values) if capacity_values else None,
+                'max': max(capacity_values) if capacity_values else None
+            }
+        }
+    }
+
+@assets_bp.route('/facets', methods=['GET'])
+def get_asset_facets():
+    """Get per-type, price-bucket and capacity facets for the current filters"""
+    try:
+        return _cached_json('facets', _query_facets)
+    except Exception as e:
+        print(f"Error in get_asset_facets: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@assets_bp.route('/image-queue-stats', methods=['GET'])
+def get_image_queue_stats():
+    """Queue depth and job counters of the background image worker pool"""
+    return jsonify(get_image_worker().stats()), 200
+
+@assets_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss counters and size of the catalog listing cache"""
+    return jsonify(get_catalog_cache().stats()), 200
+
 @assets_bp.route('/<int:asset_id>', methods=['GET'])
 def get_asset(asset_id):
     """Get a specific asset by ID"""
@@ -91,34 +427,11 @@ def create_asset():
         
         print(f"[CREATE ASSET] Received data: {data}")
         
-        # Validate required fields
-        required_fields = ['title', 'asset_type', 'price_per_day', 'location']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        # Validate asset type
+        # Validate fields (shared with the bulk importer)
         try:
-            asset_type = AssetType(data['asset_type'])
-        except ValueError:
-            return jsonify({'error': 'Invalid asset type'}), 400
-        
-        # Create asset
-        asset = Asset(
-            owner_id=user_id,
-            title=data['title'],
-            description=data.get('description', ''),
-            asset_type=asset_type,
-            brand=data.get('brand', ''),
-            model=data.get('model', ''),
-            year=int(data['year']) if data.get('year') else None,
-            capacity=int(data['capacity']) if data.get('capacity') else None,
-            price_per_day=float(data['price_per_day']),
-            location=data['location'],
-            latitude=float(data['latitude']) if data.get('latitude') else None,
-            longitude=float(data['longitude']) if data.get('longitude') else None,
-            is_available=True
-        )
+            asset = Asset(**parse_asset_fields(data, user_id))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         db.session.add(asset)
         db.session.flush()
@@ -136,10 +449,12 @@ def create_asset():
                     asset_image = AssetImage(
                         asset_id=asset.id,
                         image_url=f'/uploads/assets/{filename}',
-                        is_primary=(i == 0)
+                        is_primary=(i == 0),
+                        content_hash=content_hash_from_filename(filename),
+                        processing_status='pending' if images_supported() else 'ready'
                     )
                     db.session.add(asset_image)
-                    uploaded_images.append(filename)
+                    uploaded_images.append(asset_image)
                     print(f"[CREATE ASSET] Added image record: /uploads/assets/{filename}")
                 else:
                     print(f"[CREATE ASSET] Failed to save file: {file.filename}")
@@ -148,13 +463,15 @@ def create_asset():
         
         print(f"[CREATE ASSET] Successfully committed asset {asset.id} with {len(uploaded_images)} images")
         
-        # Verify the asset was saved with images
-        saved_asset = Asset.query.get(asset.id)
-        print(f"[CREATE ASSET] Verification - Asset {saved_asset.id}: is_available={saved_asset.is_available}, images={len(saved_asset.images)}")
+        # Originals are durable now; derivatives are generated in the background
+        response_asset = asset.to_dict()
+        for asset_image in uploaded_images:
+            if asset_image.processing_status == 'pending':
+                enqueue_image_processing(asset_image.id)
         
         return jsonify({
             'message': 'Asset created successfully',
-            'asset': asset.to_dict(),
+            'asset': response_asset,
             'images_uploaded': len(uploaded_images)
         }), 201
         
@@ -165,6 +482,41 @@ def create_asset():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@assets_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_assets_route():
+    """Bulk-create assets from a streamed NDJSON or CSV body (owners only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if user.user_type.value != 'owner':
+            return jsonify({'error': 'Only owners can create assets'}), 403
+        
+        import_format = request.args.get('format')
+        if not import_format:
+            mimetype = request.mimetype or ''
+            import_format = 'csv' if mimetype in ('text/csv', 'application/csv') else 'ndjson'
+        
+        if import_format == 'ndjson':
+            rows = iter_ndjson_rows(request.stream)
+        elif import_format == 'csv':
+            rows = iter_csv_rows(request.stream)
+        else:
+            return jsonify({'error': 'format must be ndjson or csv'}), 400
+        
+        report = import_assets(user_id, rows)
+        print(f"[IMPORT ASSETS] User {user_id}: created {report['created']}, failed {report['failed']}")
+        
+        # Nothing usable in the body at all is a client error; partial imports report per row
+        status = 400 if report['failed'] and not report['created'] else 200
+        return jsonify(report), status
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"[IMPORT ASSETS] Error importing assets: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @assets_bp.route('/<int:asset_id>', methods=['PUT'])
 @jwt_required()
 def update_asset(asset_id):
@@ -220,6 +572,167 @@ def update_asset(asset_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@assets_bp.route('/<int:asset_id>/price-rules', methods=['GET'])
+def get_price_rules(asset_id):
+    """List an asset's weekend, season and minimum-stay price rules"""
+    try:
+        if db.session.get(Asset, asset_id) is None:
+            return jsonify({'error': 'Asset not found'}), 404
+        
+        rules = PriceRule.query.filter_by(asset_id=asset_id).order_by(PriceRule.priority.desc(), PriceRule.id.desc()).all()
+        return jsonify({'price_rules': [rule.to_dict() for rule in rules]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@assets_bp.route('/<int:asset_id>/price-rules', methods=['POST'])
+@jwt_required()
+def create_price_rule(asset_id):
+    """Add a price rule to an asset (owner only)"""
+    try:
+        user_id = get_jwt_identity()
+        asset = Asset.query.get(asset_id)
+        
+        if not asset:
+            return jsonify({'error': 'Asset not found'}), 404
+        
+        if asset.owner_id != user_id:
+            return jsonify({'error': 'You can only price your own assets'}), 403
+        
+        try:
+            fields = parse_price_rule(request.get_json() or {})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rule = PriceRule(asset_id=asset_id, **fields)
+        db.session.add(rule)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Price rule created successfully',
+            'price_rule': rule.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@assets_bp.route('/<int:asset_id>/price-rules/<int:rule_id>', methods=['DELETE'])
+@jwt_required()
+def delete_price_rule(asset_id, rule_id):
+    """Remove a price rule from an asset (owner only)"""
+    try:
+        user_id = get_jwt_identity()
+        rule = PriceRule.query.filter_by(id=rule_id, asset_id=asset_id).first()
+        
+        if not rule:
+            return jsonify({'error': 'Price rule not found'}), 404
+        
+        if rule.asset.owner_id != user_id:
+            return jsonify({'error': 'You can only price your own assets'}), 403
+        
+        db.session.delete(rule)
+        db.session.commit()
+        
+        return jsonify({'message': 'Price rule deleted successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@assets_bp.route('/bulk', methods=['PUT'])
+@jwt_required()
+def bulk_update_assets():
+    """Apply one price/availability change to many of the owner's assets in a single UPDATE"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        # Which assets: an explicit id list or a filter, always scoped to the caller's fleet
+        criteria = [Asset.owner_id == user_id]
+        asset_ids = data.get('asset_ids')
+        filters = data.get('filter')
+        if (asset_ids is None) == (filters is None):
+            return jsonify({'error': 'Provide exactly one of asset_ids or filter'}), 400
+        
+        if asset_ids is not None:
+            if not isinstance(asset_ids, list) or not asset_ids or not all(isinstance(i, int) for i in asset_ids):
+                return jsonify({'error': 'asset_ids must be a non-empty list of integers'}), 400
+            if len(asset_ids) > MAX_BULK_UPDATE_IDS:
+                return jsonify({'error': f'At most {MAX_BULK_UPDATE_IDS} asset_ids per request'}), 400
+            criteria.append(Asset.id.in_(set(asset_ids)))
+        else:
+            if not isinstance(filters, dict):
+                return jsonify({'error': 'filter must be an object'}), 400
+            unknown = set(filters) - {'asset_type', 'is_available'}
+            if unknown:
+                return jsonify({'error': f'Unsupported filter: {", ".join(sorted(unknown))}'}), 400
+            if 'asset_type' in filters:
+                try:
+                    criteria.append(Asset.asset_type == AssetType(filters['asset_type']))
+                except ValueError:
+                    return jsonify({'error': 'Invalid asset type'}), 400
+            if 'is_available' in filters:
+                if not isinstance(filters['is_available'], bool):
+                    return jsonify({'error': 'filter.is_available must be true or false'}), 400
+                criteria.append(Asset.is_available == filters['is_available'])
+        
+        # What to change
+        changes = data.get('set') or {}
+        if not isinstance(changes, dict):
+            return jsonify({'error': 'set must be an object'}), 400
+        unknown = set(changes) - {'is_available', 'price_per_day'}
+        if unknown:
+            return jsonify({'error': f'Unsupported field: {", ".join(sorted(unknown))}'}), 400
+        
+        values = {}
+        if 'is_available' in changes:
+            if not isinstance(changes['is_available'], bool):
+                return jsonify({'error': 'is_available must be true or false'}), 400
+            values['is_available'] = changes['is_available']
+        
+        price_change_percent = data.get('price_change_percent')
+        if 'price_per_day' in changes and price_change_percent is not None:
+            return jsonify({'error': 'Use either set.price_per_day or price_change_percent'}), 400
+        if 'price_per_day' in changes:
+            price = changes['price_per_day']
+            if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+                return jsonify({'error': 'price_per_day must be a non-negative number'}), 400
+            values['price_per_day'] = float(price)
+        elif price_change_percent is not None:
+            if isinstance(price_change_percent, bool) or not isinstance(price_change_percent, (int, float)) \
+                    or price_change_percent <= -100:
+                return jsonify({'error': 'price_change_percent must be a number greater than -100'}), 400
+            factor = 1 + price_change_percent / 100.0
+            values['price_per_day'] = db.func.round(Asset.price_per_day * factor, 2)
+        
+        if not values:
+            return jsonify({'error': 'Nothing to update'}), 400
+        
+        result = db.session.execute(
+            db.update(Asset).where(*criteria).values(**values),
+            execution_options={'synchronize_session': False}
+        )
+        # A set-based UPDATE skips the ORM flush events, so invalidate the catalog once here
+        mark_catalog_changed(db.session)
+        if 'price_per_day' in values:
+            mark_pricing_changed(db.session)
+        db.session.commit()
+        
+        print(f"[BULK UPDATE ASSETS] User {user_id} updated {result.rowcount} assets")
+        
+        response = {
+            'message': 'Assets updated successfully',
+            'updated_count': result.rowcount
+        }
+        if asset_ids is not None:
+            response['requested_count'] = len(set(asset_ids))
+        return jsonify(response), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @assets_bp.route('/debug', methods=['GET'])
 def debug_assets():
     """Debug route to see all assets"""
@@ -248,18 +761,18 @@ def get_my_assets():
     """Get all assets owned by the current user"""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
         
-        print(f"[GET MY ASSETS] User {user_id} ({user.user_type.value}) requesting their assets")
+        try:
+            fields = _resolve_fields(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        assets = Asset.query.options(db.joinedload(Asset.images)).filter_by(owner_id=user_id).all()
+        assets = Asset.query.options(*_projection_options(fields)).filter_by(owner_id=user_id).order_by(Asset.id).all()
         
         print(f"[GET MY ASSETS] Found {len(assets)} assets for user {user_id}")
-        for asset in assets:
-            print(f"[GET MY ASSETS] Asset: {asset.id} - {asset.title} - Available: {asset.is_available} - Images: {len(asset.images)}")
         
         return jsonify({
-            'assets': [asset.to_dict() for asset in assets],
+            'assets': _serialize_assets(assets, fields),
             'count': len(assets)
         }), 200
         
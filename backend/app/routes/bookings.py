@@ -1,13 +1,23 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime, timedelta
 from app import db
-from app.models.booking import Booking, BookingStatus
+from app.models.booking import Booking, BookingStatus, ACTIVE_BOOKING_STATUSES, adjust_booking_counts
 from app.models.asset import Asset
 from app.models.user import User
+from app.utils.availability import DEFAULT_CALENDAR_DAYS, MAX_CALENDAR_DAYS, mark_availability_changed, occupancy_calendar
+from app.utils.dates import parse_iso_datetime
+from app.utils.pricing import quote_price
+from app.utils.pagination import parse_limit, encode_cursor, decode_cursor, keyset_filter
+from app.utils.reservations import BookingConflict, confirmed_ranges, lock_assets, overlaps_any, reserve_asset
+from app.utils.catalog_cache import mark_rankings_changed
 
 bookings_bp = Blueprint('bookings', __name__)
 
+MAX_AVAILABILITY_CHECKS = 200
+MAX_BULK_STATUS_IDS = 500
+
 @bookings_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_booking():
@@ -35,8 +45,8 @@ def create_booking():
         
         # Parse dates
         try:
-            start_date = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00'))
-            end_date = datetime.fromisoformat(data['end_date'].replace('Z', '+00:00'))
+            start_date = parse_iso_datetime(data['start_date'])
+            end_date = parse_iso_datetime(data['end_date'])
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}), 400
         
@@ -47,39 +57,15 @@ def create_booking():
         if start_date < datetime.now():
             return jsonify({'error': 'Start date cannot be in the past'}), 400
         
-        # Check for conflicting bookings
-        conflicting_bookings = Booking.query.filter(
-            Booking.asset_id == data['asset_id'],
-            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING]),
-            db.or_(
-                db.and_(Booking.start_date <= start_date, Booking.end_date > start_date),
-                db.and_(Booking.start_date < end_date, Booking.end_date >= end_date),
-                db.and_(Booking.start_date >= start_date, Booking.end_date <= end_date)
-            )
-        ).first()
-        
-        if conflicting_bookings:
-            return jsonify({'error': 'Asset is already booked for the selected dates'}), 400
-        
-        # Calculate total price
-        total_days = (end_date - start_date).days
-        if total_days == 0:
-            total_days = 1  # Minimum 1 day
-        total_price = total_days * asset.price_per_day
-        
-        # Create booking
-        booking = Booking(
-            client_id=user_id,
-            owner_id=asset.owner_id,
-            asset_id=data['asset_id'],
-            start_date=start_date,
-            end_date=end_date,
-            total_price=total_price,
-            special_requests=data.get('special_requests')
-        )
-        
-        db.session.add(booking)
-        db.session.commit()
+        quote = quote_price(asset.id, start_date, end_date, fresh=True)
+        if not quote['meets_min_stay']:
+            return jsonify({'error': f"Bookings starting on this date must be at least {quote['min_stay']} days"}), 400
+        
+        # Conflict check and insert run under the asset's lock
+        try:
+            booking = reserve_asset(asset, user_id, start_date, end_date, data.get('special_requests'))
+        except BookingConflict as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'message': 'Booking created successfully',
@@ -90,26 +76,118 @@ def create_booking():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _parse_status_filter(value):
+    if not value:
+        return None
+    try:
+        return [BookingStatus(status.strip()) for status in value.split(',') if status.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid status; use one of {', '.join(status.value for status in BookingStatus)}")
+
+def _booking_list_query(role_column, user_id, statuses, window_start, window_end):
+    query = Booking.query.filter(role_column == user_id).options(
+        db.joinedload(Booking.client),
+        db.joinedload(Booking.owner),
+        # to_dict only needs the asset's own columns, not its images
+        db.joinedload(Booking.asset).lazyload(Asset.images)
+    )
+    if statuses:
+        query = query.filter(Booking.status.in_(statuses))
+    if window_start is not None:
+        query = query.filter(Booking.end_date > window_start)
+    if window_end is not None:
+        query = query.filter(Booking.start_date < window_end)
+    return query
+
+def _page_bookings(query, list_name, limit, cursor):
+    """Newest-first keyset page of a booking list; returns (bookings, has_more, next_cursor)"""
+    query = query.order_by(Booking.id.desc())
+    if cursor:
+        cursor_list, _, last_id = decode_cursor(cursor)
+        if cursor_list != list_name:
+            raise ValueError(f'Cursor does not belong to bookings_{list_name}')
+        query = query.filter(keyset_filter(Booking.id, last_id, descending=True))
+    bookings = query.limit(limit + 1).all()
+    has_more = len(bookings) > limit
+    bookings = bookings[:limit]
+    next_cursor = encode_cursor(list_name, None, bookings[-1].id) if has_more else None
+    return bookings, has_more, next_cursor
+
+def _booking_status_counts(user_id, window_start, window_end):
+    """Per-status counts of the user's made and received bookings from one GROUP BY"""
+    query = db.session.query(
+        Booking.status,
+        db.func.sum(db.case((Booking.client_id == user_id, 1), else_=0)),
+        db.func.sum(db.case((Booking.owner_id == user_id, 1), else_=0))
+    ).filter(db.or_(Booking.client_id == user_id, Booking.owner_id == user_id))
+    if window_start is not None:
+        query = query.filter(Booking.end_date > window_start)
+    if window_end is not None:
+        query = query.filter(Booking.start_date < window_end)
+    
+    counts = {
+        'made': {status.value: 0 for status in BookingStatus},
+        'received': {status.value: 0 for status in BookingStatus}
+    }
+    for status, made, received in query.group_by(Booking.status):
+        if status is not None:
+            counts['made'][status.value] = int(made or 0)
+            counts['received'][status.value] = int(received or 0)
+    return counts
+
 @bookings_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_my_bookings():
-    """Get bookings for the current user (both made and received)"""
+    """Get bookings for the current user (both made and received)
+    
+    Optional filters: status (comma-separated), from/to (bookings overlapping the
+    window) and list=made|received. Passing limit or made_cursor/received_cursor
+    pages each list newest first; without them both lists are returned in full.
+    """
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        # Get bookings made by user (as client)
-        bookings_made = Booking.query.filter_by(client_id=user_id).all()
         
-        # Get bookings received by user (as owner)
-        bookings_received = Booking.query.filter_by(owner_id=user_id).all()
+        try:
+            statuses = _parse_status_filter(request.args.get('status'))
+            window_start = parse_iso_datetime(request.args['from']) if request.args.get('from') else None
+            window_end = parse_iso_datetime(request.args['to']) if request.args.get('to') else None
+            limit = request.args.get('limit')
+            cursors = {name: request.args.get(f'{name}_cursor') for name in ('made', 'received')}
+            paginate = limit is not None or any(cursors.values())
+            if paginate:
+                limit = parse_limit(limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        requested_lists = request.args.get('list')
+        if requested_lists not in (None, 'made', 'received'):
+            return jsonify({'error': 'list must be made or received'}), 400
+        
+        counts = _booking_status_counts(user_id, window_start, window_end)
+        selected = [status.value for status in statuses] if statuses else [status.value for status in BookingStatus]
+        response = {
+            'counts': counts,
+            'total_made': sum(counts['made'][status] for status in selected),
+            'total_received': sum(counts['received'][status] for status in selected)
+        }
+        
+        roles = {'made': Booking.client_id, 'received': Booking.owner_id}
+        for list_name, role_column in roles.items():
+            if requested_lists and list_name != requested_lists:
+                continue
+            query = _booking_list_query(role_column, user_id, statuses, window_start, window_end)
+            if paginate:
+                try:
+                    bookings, has_more, next_cursor = _page_bookings(query, list_name, limit, cursors[list_name])
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                response[f'{list_name}_has_more'] = has_more
+                response[f'{list_name}_next_cursor'] = next_cursor
+            else:
+                bookings = query.order_by(Booking.id).all()
+            response[f'bookings_{list_name}'] = [booking.to_dict(include_relations=True) for booking in bookings]
         
-        return jsonify({
-            'bookings_made': [booking.to_dict(include_relations=True) for booking in bookings_made],
-            'bookings_received': [booking.to_dict(include_relations=True) for booking in bookings_received],
-            'total_made': len(bookings_made),
-            'total_received': len(bookings_received)
-        }), 200
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -154,23 +232,23 @@ def update_booking_status(booking_id):
         except ValueError:
             return jsonify({'error': 'Invalid status'}), 400
         
-        # Check permissions
-        if user_id == booking.owner_id:
-            # Owner can confirm or cancel pending bookings
-            if booking.status == BookingStatus.PENDING and new_status in [BookingStatus.CONFIRMED, BookingStatus.CANCELLED]:
-                booking.status = new_status
-            elif booking.status == BookingStatus.CONFIRMED and new_status == BookingStatus.COMPLETED:
-                booking.status = new_status
-            else:
-                return jsonify({'error': 'Invalid status transition'}), 400
-        elif user_id == booking.client_id:
-            # Client can only cancel their own bookings
-            if new_status == BookingStatus.CANCELLED and booking.status in [BookingStatus.PENDING, BookingStatus.CONFIRMED]:
-                booking.status = new_status
-            else:
-                return jsonify({'error': 'Clients can only cancel bookings'}), 400
-        else:
-            return jsonify({'error': 'You can only update your own bookings'}), 403
+        # Lock first, then re-read the status the transition rules are checked against
+        lock_assets([booking.asset_id])
+        db.session.refresh(booking)
+        
+        # Same rules as the bulk endpoint
+        error = booking.transition_error(user_id, new_status)
+        if error:
+            db.session.rollback()
+            return jsonify({'error': error[0]}), error[1]
+        
+        if new_status == BookingStatus.CONFIRMED:
+            # An overlapping booking may have been confirmed since the request started
+            taken = confirmed_ranges([booking.asset_id], booking.start_date, booking.end_date, exclude_ids=[booking.id])
+            if taken:
+                db.session.rollback()
+                return jsonify({'error': 'Asset is already booked for the selected dates'}), 400
+        booking.status = new_status
         
         db.session.commit()
         
@@ -183,6 +261,93 @@ def update_booking_status(booking_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bookings_bp.route('/status', methods=['PUT'])
+@jwt_required()
+def bulk_update_booking_status():
+    """Move many bookings to one status in a single transaction, reporting each outcome"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        booking_ids = data.get('booking_ids')
+        if not isinstance(booking_ids, list) or not booking_ids:
+            return jsonify({'error': 'booking_ids must be a non-empty list'}), 400
+        if len(booking_ids) > MAX_BULK_STATUS_IDS:
+            return jsonify({'error': f'At most {MAX_BULK_STATUS_IDS} bookings per request'}), 400
+        if not all(isinstance(booking_id, int) for booking_id in booking_ids):
+            return jsonify({'error': 'booking_ids must be integers'}), 400
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        try:
+            new_status = BookingStatus(data['status'])
+        except ValueError:
+            return jsonify({'error': 'Invalid status'}), 400
+        
+        booking_ids = list(dict.fromkeys(booking_ids))
+        asset_ids = [row.asset_id for row in db.session.query(Booking.asset_id).filter(Booking.id.in_(booking_ids)).distinct()]
+        # Lock first, then read the statuses the transition rules are checked against
+        lock_assets(asset_ids)
+        bookings = {
+            booking.id: booking
+            for booking in Booking.query.filter(Booking.id.in_(booking_ids)).populate_existing()
+        }
+        
+        taken = {}
+        if new_status == BookingStatus.CONFIRMED and bookings:
+            taken = confirmed_ranges(
+                asset_ids,
+                min(booking.start_date for booking in bookings.values()),
+                max(booking.end_date for booking in bookings.values())
+            )
+        
+        accepted, rejected = [], []
+        for booking_id in booking_ids:
+            booking = bookings.get(booking_id)
+            if booking is None:
+                rejected.append({'id': booking_id, 'error': 'Booking not found'})
+                continue
+            error = booking.transition_error(user_id, new_status)
+            if error:
+                rejected.append({'id': booking_id, 'error': error[0]})
+                continue
+            if new_status == BookingStatus.CONFIRMED:
+                ranges = taken.setdefault(booking.asset_id, [])
+                if overlaps_any(ranges, booking.start_date, booking.end_date):
+                    rejected.append({'id': booking_id, 'error': 'Asset is already booked for the selected dates'})
+                    continue
+                # Later bookings in this batch must not overlap the ones confirmed here
+                ranges.append((booking.start_date, booking.end_date))
+            accepted.append(booking_id)
+        
+        if accepted:
+            db.session.execute(
+                db.update(Booking)
+                .where(Booking.id.in_(accepted))
+                .values(status=new_status, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            if new_status == BookingStatus.CANCELLED:
+                # Also skipped by the UPDATE: cancelled bookings leave the popularity count
+                released = Counter(bookings[booking_id].asset_id for booking_id in accepted)
+                adjust_booking_counts(db.session, {asset_id: -count for asset_id, count in released.items()})
+                mark_rankings_changed(db.session)
+            # The set-based UPDATE bypasses the ORM flush hooks that normally invalidate calendars
+            mark_availability_changed(db.session, {bookings[booking_id].asset_id for booking_id in accepted})
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'Updated {len(accepted)} bookings',
+            'status': new_status.value,
+            'updated': accepted,
+            'rejected': rejected,
+            'updated_count': len(accepted),
+            'rejected_count': len(rejected)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @bookings_bp.route('/asset/<int:asset_id>/availability', methods=['GET'])
 def check_asset_availability(asset_id):
     """Check availability for an asset in a date range"""
@@ -198,20 +363,15 @@ def check_asset_availability(asset_id):
             return jsonify({'error': 'start_date and end_date are required'}), 400
         
         try:
-            start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+            start_date = parse_iso_datetime(start_date)
+            end_date = parse_iso_datetime(end_date)
         except ValueError:
             return jsonify({'error': 'Invalid date format'}), 400
         
         # Check for conflicting bookings
         conflicting_bookings = Booking.query.filter(
             Booking.asset_id == asset_id,
-            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING]),
-            db.or_(
-                db.and_(Booking.start_date <= start_date, Booking.end_date > start_date),
-                db.and_(Booking.start_date < end_date, Booking.end_date >= end_date),
-                db.and_(Booking.start_date >= start_date, Booking.end_date <= end_date)
-            )
+            Booking.conflicts_with(start_date, end_date)
         ).all()
         
         is_available = len(conflicting_bookings) == 0
@@ -225,6 +385,154 @@ def check_asset_availability(asset_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bookings_bp.route('/availability', methods=['POST'])
+def check_availability_batch():
+    """Check many {asset_id, start_date, end_date} ranges at once.
+    
+    results[i] is true/false for checks[i], or null when the check is invalid
+    (see errors). Conflicting bookings are listed only with include_conflicts.
+    """
+    try:
+        data = request.get_json() or {}
+        checks = data.get('checks')
+        if not isinstance(checks, list) or not checks:
+            return jsonify({'error': 'checks must be a non-empty list'}), 400
+        if len(checks) > MAX_AVAILABILITY_CHECKS:
+            return jsonify({'error': f'At most {MAX_AVAILABILITY_CHECKS} checks per request'}), 400
+        include_conflicts = data.get('include_conflicts', False)
+        if not isinstance(include_conflicts, bool):
+            return jsonify({'error': 'include_conflicts must be true or false'}), 400
+        
+        results = [None] * len(checks)
+        errors = []
+        ranges = []
+        for index, check in enumerate(checks):
+            try:
+                asset_id = int(check['asset_id'])
+                start_date = parse_iso_datetime(check['start_date'])
+                end_date = parse_iso_datetime(check['end_date'])
+            except (TypeError, KeyError, ValueError):
+                errors.append({'index': index, 'error': 'asset_id, start_date and end_date are required ISO values'})
+                continue
+            if start_date >= end_date:
+                errors.append({'index': index, 'error': 'End date must be after start date'})
+                continue
+            ranges.append((index, asset_id, start_date, end_date))
+        
+        asset_ids = {asset_id for _, asset_id, _, _ in ranges}
+        existing = {row.id for row in db.session.query(Asset.id).filter(Asset.id.in_(asset_ids))} if asset_ids else set()
+        
+        # One query: every active booking inside each asset's overall requested window
+        windows = {}
+        for _, asset_id, start_date, end_date in ranges:
+            if asset_id in existing:
+                low, high = windows.get(asset_id, (start_date, end_date))
+                windows[asset_id] = (min(low, start_date), max(high, end_date))
+        bookings_by_asset = {}
+        if windows:
+            columns = [Booking.asset_id, Booking.start_date, Booking.end_date]
+            if include_conflicts:
+                columns += [Booking.id, Booking.status]
+            rows = db.session.query(*columns).filter(db.or_(*(
+                db.and_(Booking.asset_id == asset_id, Booking.conflicts_with(low, high))
+                for asset_id, (low, high) in windows.items()
+            )))
+            for row in rows:
+                bookings_by_asset.setdefault(row.asset_id, []).append(row)
+        
+        conflicts = {}
+        for index, asset_id, start_date, end_date in ranges:
+            if asset_id not in existing:
+                errors.append({'index': index, 'error': 'Asset not found'})
+                continue
+            overlapping = [
+                row for row in bookings_by_asset.get(asset_id, ())
+                if row.start_date < end_date and row.end_date > start_date
+            ]
+            results[index] = not overlapping
+            if include_conflicts and overlapping:
+                conflicts[str(index)] = [{
+                    'id': row.id,
+                    'start_date': row.start_date.isoformat(),
+                    'end_date': row.end_date.isoformat(),
+                    'status': row.status.value
+                } for row in overlapping]
+        
+        response = {'results': results}
+        if errors:
+            response['errors'] = sorted(errors, key=lambda error: error['index'])
+        if include_conflicts:
+            response['conflicts'] = conflicts
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bookings_bp.route('/asset/<int:asset_id>/calendar', methods=['GET'])
+def get_asset_calendar(asset_id):
+    """Day-by-day occupancy of an asset (?from=&to=, inclusive ISO dates, up to a year)"""
+    try:
+        if db.session.get(Asset, asset_id) is None:
+            return jsonify({'error': 'Asset not found'}), 404
+        
+        try:
+            first_day = parse_iso_datetime(request.args['from']).date() if request.args.get('from') else date.today()
+            last_day = (
+                parse_iso_datetime(request.args['to']).date() if request.args.get('to')
+                else first_day + timedelta(days=DEFAULT_CALENDAR_DAYS - 1)
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+        
+        days = (last_day - first_day).days + 1
+        if days < 1:
+            return jsonify({'error': 'to must not be before from'}), 400
+        if days > MAX_CALENDAR_DAYS:
+            return jsonify({'error': f'The calendar covers at most {MAX_CALENDAR_DAYS} days'}), 400
+        
+        bitmap, busy_ranges = occupancy_calendar(asset_id, first_day, last_day)
+        return jsonify({
+            'asset_id': asset_id,
+            'from': first_day.isoformat(),
+            'to': last_day.isoformat(),
+            'days': days,
+            'bitmap': bitmap,
+            'busy_ranges': busy_ranges
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bookings_bp.route('/asset/<int:asset_id>/quote', methods=['GET'])
+def get_asset_quote(asset_id):
+    """Price of booking an asset for ?start_date=&end_date= (&breakdown=true for daily prices)"""
+    try:
+        if db.session.get(Asset, asset_id) is None:
+            return jsonify({'error': 'Asset not found'}), 404
+        
+        if not request.args.get('start_date') or not request.args.get('end_date'):
+            return jsonify({'error': 'start_date and end_date are required'}), 400
+        try:
+            start_date = parse_iso_datetime(request.args['start_date'])
+            end_date = parse_iso_datetime(request.args['end_date'])
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+        
+        if start_date >= end_date:
+            return jsonify({'error': 'End date must be after start date'}), 400
+        
+        quote = quote_price(asset_id, start_date, end_date,
+                            breakdown=request.args.get('breakdown', '').lower() in ('1', 'true', 'yes'))
+        quote.update({
+            'asset_id': asset_id,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat()
+        })
+        return jsonify(quote), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bookings_bp.route('/asset/<int:asset_id>/bookings', methods=['GET'])
 def get_asset_bookings(asset_id):
     """Get confirmed/pending bookings for an asset (for display purposes)"""
@@ -237,7 +545,7 @@ def get_asset_bookings(asset_id):
         now = datetime.now()
         bookings = Booking.query.filter(
             Booking.asset_id == asset_id,
-            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING]),
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES),
             Booking.end_date >= now  # Only show current and future bookings
         ).order_by(Booking.start_date).all()
         
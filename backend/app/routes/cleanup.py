@@ -1,8 +1,7 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
 from app import db
-from app.models.booking import Booking, BookingStatus
+from app.utils.booking_maintenance import expire_pending_bookings
 from app.models.user import User
 
 cleanup_bp = Blueprint('cleanup', __name__)
@@ -15,20 +14,7 @@ def cleanup_expired_bookings():
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
         
-        # Find all pending bookings with past start dates
-        now = datetime.now()
-        expired_bookings = Booking.query.filter(
-            Booking.status == BookingStatus.PENDING,
-            Booking.start_date < now
-        ).all()
-        
-        deleted_count = len(expired_bookings)
-        
-        # Delete each expired booking
-        for booking in expired_bookings:
-            db.session.delete(booking)
-        
-        db.session.commit()
+        deleted_count = expire_pending_bookings()
         
         return jsonify({
             'message': f'Cleaned up {deleted_count} expired bookings',
@@ -48,31 +34,11 @@ def cleanup_my_expired_bookings():
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
         
-        now = datetime.now()
-        
-        # Find user's expired bookings (both as client and owner)
+        # Clients clean up their own requests, owners the requests they received
         if user.user_type.value == 'client':
-            # For clients, delete their expired booking requests
-            expired_bookings = Booking.query.filter(
-                Booking.client_id == user_id,
-                Booking.status == BookingStatus.PENDING,
-                Booking.start_date < now
-            ).all()
+            deleted_count = expire_pending_bookings(client_id=user_id)
         else:
-            # For owners, delete expired booking requests they received
-            expired_bookings = Booking.query.filter(
-                Booking.owner_id == user_id,
-                Booking.status == BookingStatus.PENDING,
-                Booking.start_date < now
-            ).all()
-        
-        deleted_count = len(expired_bookings)
-        
-        # Delete each expired booking
-        for booking in expired_bookings:
-            db.session.delete(booking)
-        
-        db.session.commit()
+            deleted_count = expire_pending_bookings(owner_id=user_id)
         
         return jsonify({
             'message': f'Cleaned up {deleted_count} expired bookings',
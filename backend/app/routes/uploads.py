@@ -0,0 +1,337 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.exceptions import ClientDisconnected
+from app import db
+from app.models.asset import Asset, AssetImage
+from app.models.upload import UploadSession
+from app.utils.file_upload import (
+    CHUNK_SIZE, SNIFF_BYTES, UPLOAD_SESSION_FOLDER, resolve_upload_folder, session_part_path, sniff_image_type,
+    store_file, content_hash_from_filename
+)
+from app.utils.image_processing import images_supported
+from app.utils.image_worker import enqueue_image_processing
+from datetime import datetime, timedelta
+import os
+
+uploads_bp = Blueprint('uploads', __name__)
+
+UPLOAD_FOLDER = 'uploads/assets'
+# A chunk writer that dies mid-request stops blocking the session after this long
+CHUNK_LEASE_SECONDS = 5 * 60
+
+def _part_path(upload_session):
+    return session_part_path(upload_session.id)
+
+def _session_expiry():
+    return datetime.utcnow() + timedelta(seconds=current_app.config.get('UPLOAD_SESSION_TTL', 24 * 60 * 60))
+
+def _discard_part(upload_session):
+    path = _part_path(upload_session)
+    if os.path.exists(path):
+        os.remove(path)
+
+def _get_own_session(session_id, user_id):
+    """Return (upload_session, error_response) for a session owned by the user"""
+    upload_session = db.session.get(UploadSession, session_id)
+    if not upload_session:
+        return None, (jsonify({'error': 'Upload session not found'}), 404)
+    if upload_session.owner_id != user_id:
+        return None, (jsonify({'error': 'You can only access your own uploads'}), 403)
+    return upload_session, None
+
+def _check_open(upload_session):
+    """Error response unless the session still accepts chunks"""
+    if upload_session.status != 'open':
+        return jsonify({'error': f'Upload is {upload_session.status}'}), 409
+    if upload_session.is_expired():
+        return jsonify({'error': 'Upload session has expired'}), 410
+    return None
+
+def _claim_chunk(upload_session, offset):
+    """Take the chunk lease at offset; False if another request holds it or the offset moved"""
+    now = datetime.utcnow()
+    result = db.session.execute(
+        db.update(UploadSession)
+        .where(
+            UploadSession.id == upload_session.id,
+            UploadSession.status == 'open',
+            UploadSession.received_size == offset,
+            db.or_(UploadSession.chunk_lease_until.is_(None), UploadSession.chunk_lease_until < now)
+        )
+        .values(chunk_lease_until=now + timedelta(seconds=CHUNK_LEASE_SECONDS))
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def _claim_completion(upload_session):
+    """Move a fully received session from 'open' to 'completing'; False if another request got there first"""
+    result = db.session.execute(
+        db.update(UploadSession)
+        .where(
+            UploadSession.id == upload_session.id,
+            UploadSession.status == 'open',
+            UploadSession.received_size == UploadSession.total_size,
+            db.or_(UploadSession.chunk_lease_until.is_(None), UploadSession.chunk_lease_until < datetime.utcnow())
+        )
+        .values(status='completing', expires_at=_session_expiry())
+    )
+    db.session.commit()
+    db.session.refresh(upload_session)
+    return result.rowcount == 1
+
+def _release_completion(upload_session):
+    """Undo a failed completion: reopen the session while its part file still exists, else abort it"""
+    db.session.execute(
+        db.update(UploadSession)
+        .where(UploadSession.id == upload_session.id, UploadSession.status == 'completing')
+        .values(status='open' if os.path.exists(_part_path(upload_session)) else 'aborted')
+    )
+    db.session.commit()
+
+def _release_chunk(upload_session, received_size=None):
+    """Drop the chunk lease, advancing the offset if bytes were accepted"""
+    values = {'chunk_lease_until': None, 'expires_at': _session_expiry()}
+    if received_size is not None:
+        values['received_size'] = received_size
+    db.session.execute(db.update(UploadSession).where(UploadSession.id == upload_session.id).values(**values))
+    db.session.commit()
+    db.session.refresh(upload_session)
+
+def _write_chunk(path, offset, stream, max_bytes):
+    """Copy the request stream into the part file at offset; returns (bytes_written, overflow, disconnected)"""
+    written = 0
+    overflow = disconnected = False
+    with open(path, 'r+b') as part_file:
+        part_file.seek(offset)
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if written + len(chunk) > max_bytes:
+                    overflow = True
+                    break
+                part_file.write(chunk)
+                written += len(chunk)
+        except ClientDisconnected:
+            # Keep what arrived so the client can resume from the new offset
+            disconnected = True
+        part_file.flush()
+        os.fsync(part_file.fileno())
+    return written, overflow, disconnected
+
+@uploads_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_upload_session():
+    """Start a resumable image upload for one of the owner's assets"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        asset = Asset.query.get(data.get('asset_id'))
+        if not asset:
+            return jsonify({'error': 'Asset not found'}), 404
+        if asset.owner_id != user_id:
+            return jsonify({'error': 'You can only upload images for your own assets'}), 403
+        
+        try:
+            total_size = int(data.get('size'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'size is required'}), 400
+        max_size = current_app.config.get('UPLOAD_SESSION_MAX_SIZE', 100 * 1024 * 1024)
+        if total_size <= 0 or total_size > max_size:
+            return jsonify({'error': f'size must be between 1 and {max_size} bytes'}), 400
+        
+        upload_session = UploadSession(
+            owner_id=user_id,
+            asset_id=asset.id,
+            filename=(data.get('filename') or '')[:255],
+            total_size=total_size,
+            is_primary=bool(data.get('is_primary', False)),
+            expires_at=_session_expiry()
+        )
+        db.session.add(upload_session)
+        db.session.flush()
+        
+        os.makedirs(resolve_upload_folder(UPLOAD_SESSION_FOLDER), exist_ok=True)
+        open(_part_path(upload_session), 'wb').close()
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Upload session created',
+            'upload': upload_session.to_dict(),
+            'max_chunk_size': current_app.config.get('UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@uploads_bp.route('/<session_id>', methods=['GET'])
+@jwt_required()
+def get_upload_session(session_id):
+    """Report upload progress; received_size is the offset to resume from"""
+    try:
+        upload_session, error = _get_own_session(session_id, get_jwt_identity())
+        if error:
+            return error
+        return jsonify({'upload': upload_session.to_dict()}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@uploads_bp.route('/<session_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(session_id):
+    """Append a chunk at ?offset=, which must equal the bytes received so far"""
+    try:
+        upload_session, error = _get_own_session(session_id, get_jwt_identity())
+        if error:
+            return error
+        error = _check_open(upload_session)
+        if error:
+            return error
+        
+        try:
+            offset = int(request.args.get('offset', ''))
+        except ValueError:
+            return jsonify({'error': 'offset is required'}), 400
+        if offset != upload_session.received_size:
+            return jsonify({
+                'error': 'offset does not match the bytes received so far',
+                'received_size': upload_session.received_size
+            }), 409
+        # Only one request may write at this offset; a concurrent one is turned away before touching the file
+        if not _claim_chunk(upload_session, offset):
+            db.session.refresh(upload_session)
+            return jsonify({
+                'error': 'Another chunk is being written to this upload',
+                'received_size': upload_session.received_size
+            }), 409
+        
+        max_chunk = current_app.config.get('UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+        remaining = upload_session.total_size - offset
+        path = _part_path(upload_session)
+        try:
+            written, overflow, disconnected = _write_chunk(path, offset, request.stream, min(max_chunk, remaining))
+        except Exception:
+            db.session.rollback()
+            _release_chunk(upload_session)
+            raise
+        if overflow:
+            _release_chunk(upload_session)
+            return jsonify({
+                'error': f'Chunk exceeds {min(max_chunk, remaining)} bytes',
+                'received_size': upload_session.received_size
+            }), 413
+        
+        if offset == 0 and written >= min(SNIFF_BYTES, upload_session.total_size):
+            with open(path, 'rb') as part_file:
+                if sniff_image_type(part_file.read(SNIFF_BYTES)) is None:
+                    upload_session.status = 'aborted'
+                    upload_session.chunk_lease_until = None
+                    db.session.commit()
+                    _discard_part(upload_session)
+                    return jsonify({'error': 'File is not a supported image type'}), 415
+        
+        _release_chunk(upload_session, received_size=offset + written)
+        if disconnected:
+            return jsonify({'error': 'Connection closed mid-chunk', 'received_size': upload_session.received_size}), 400
+        return jsonify({'upload': upload_session.to_dict()}), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _finish_upload(upload_session):
+    """Store a claimed session's file and attach it to the asset; returns the response"""
+    path = _part_path(upload_session)
+    with open(path, 'r+b') as part_file:
+        # Drop bytes left past the end by an overflowing or retried chunk
+        part_file.truncate(upload_session.total_size)
+        ext = sniff_image_type(part_file.read(SNIFF_BYTES))
+    if ext is None:
+        upload_session.status = 'aborted'
+        db.session.commit()
+        _discard_part(upload_session)
+        return jsonify({'error': 'File is not a supported image type'}), 415
+    
+    filename, is_new = store_file(path, UPLOAD_FOLDER, ext)
+    
+    asset_id = upload_session.asset_id
+    has_images = db.session.query(AssetImage.id).filter_by(asset_id=asset_id).first() is not None
+    is_primary = upload_session.is_primary or not has_images
+    if is_primary and has_images:
+        AssetImage.query.filter_by(asset_id=asset_id, is_primary=True).update({'is_primary': False})
+    
+    asset_image = AssetImage(
+        asset_id=asset_id,
+        image_url=f'/uploads/assets/{filename}',
+        is_primary=is_primary,
+        content_hash=content_hash_from_filename(filename),
+        processing_status='pending' if images_supported() else 'ready'
+    )
+    db.session.add(asset_image)
+    upload_session.status = 'complete'
+    upload_session.image = asset_image
+    db.session.commit()
+    
+    response_upload = upload_session.to_dict()
+    if asset_image.processing_status == 'pending':
+        enqueue_image_processing(asset_image.id)
+    
+    return jsonify({'message': 'Upload complete', 'upload': response_upload}), 201
+
+@uploads_bp.route('/<session_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(session_id):
+    """Verify a fully received upload, store it and attach it to the asset as an image"""
+    try:
+        upload_session, error = _get_own_session(session_id, get_jwt_identity())
+        if error:
+            return error
+        error = _check_open(upload_session)
+        if error:
+            return error
+        if upload_session.received_size != upload_session.total_size:
+            return jsonify({
+                'error': 'Upload is incomplete',
+                'received_size': upload_session.received_size,
+                'total_size': upload_session.total_size
+            }), 409
+        
+        # Only one request may store the file and attach the image
+        if not _claim_completion(upload_session):
+            return jsonify({'error': 'Upload is being written or completed by another request'}), 409
+        
+        try:
+            return _finish_upload(upload_session)
+        except Exception:
+            db.session.rollback()
+            _release_completion(upload_session)
+            raise
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@uploads_bp.route('/<session_id>', methods=['DELETE'])
+@jwt_required()
+def abort_upload(session_id):
+    """Abandon an open upload and discard the bytes received so far"""
+    try:
+        upload_session, error = _get_own_session(session_id, get_jwt_identity())
+        if error:
+            return error
+        if upload_session.status != 'open':
+            return jsonify({'error': f'Upload is {upload_session.status}'}), 409
+        
+        upload_session.status = 'aborted'
+        db.session.commit()
+        _discard_part(upload_session)
+        
+        return jsonify({'message': 'Upload aborted'}), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
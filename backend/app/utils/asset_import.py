@@ -0,0 +1,177 @@
+import csv
+import json
+import math
+from app import db
+from app.models.asset import Asset, AssetType
+from app.utils.catalog_cache import mark_catalog_changed
+
+REQUIRED_ASSET_FIELDS = ['title', 'asset_type', 'price_per_day', 'location']
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+def _optional_number(data, field, cast):
+    value = data.get(field)
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f'{field} must be a number')
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f'{field} must be a number')
+    if not math.isfinite(number) or (cast is int and not number.is_integer()):
+        raise ValueError(f'{field} must be {"a whole number" if cast is int else "a number"}')
+    return cast(number)
+
+def _optional_string(data, field, default=''):
+    """A string field checked against the length of its Asset column"""
+    value = data.get(field)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be a string')
+    max_length = Asset.__table__.c[field].type.length
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f'{field} must be at most {max_length} characters')
+    return value
+
+def parse_asset_fields(data, owner_id):
+    """Validate incoming asset data and return the column values for a new Asset.
+
+    Raises ValueError with a client-facing message when the data is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Each asset must be an object')
+
+    for field in REQUIRED_ASSET_FIELDS:
+        if field not in data or not data[field]:
+            raise ValueError(f'{field} is required')
+
+    try:
+        asset_type = AssetType(data['asset_type'])
+    except (TypeError, ValueError):
+        raise ValueError('Invalid asset type')
+
+    price_per_day = _optional_number(data, 'price_per_day', float)
+    if price_per_day < 0:
+        raise ValueError('price_per_day must not be negative')
+
+    return {
+        'owner_id': owner_id,
+        'title': _optional_string(data, 'title'),
+        'description': _optional_string(data, 'description'),
+        'asset_type': asset_type,
+        'brand': _optional_string(data, 'brand'),
+        'model': _optional_string(data, 'model'),
+        'year': _optional_number(data, 'year', int),
+        'capacity': _optional_number(data, 'capacity', int),
+        'price_per_day': price_per_day,
+        'location': _optional_string(data, 'location'),
+        'latitude': _optional_number(data, 'latitude', float),
+        'longitude': _optional_number(data, 'longitude', float),
+        'is_available': True
+    }
+
+def _decoded_lines(stream, bad_lines):
+    """Decode a binary stream line by line, noting the numbers of lines that are not UTF-8"""
+    for line_number, raw in enumerate(stream, start=1):
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield raw.decode('utf-8', errors='replace')
+
+def iter_ndjson_rows(stream):
+    """Yield (row_number, data) per line of a binary NDJSON stream; data is an Exception on bad input"""
+    bad_lines = set()
+    for row_number, line in enumerate(_decoded_lines(stream, bad_lines), start=1):
+        if row_number in bad_lines:
+            yield row_number, ValueError('Line is not valid UTF-8')
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, ValueError(f'Invalid JSON: {e}')
+
+def iter_csv_rows(stream):
+    """Yield (row_number, data) per record of a binary CSV stream with a header row"""
+    bad_lines = set()
+    reader = csv.DictReader(_decoded_lines(stream, bad_lines))
+    last_line = 1  # the header
+    try:
+        for row_number, record in enumerate(reader, start=1):
+            # A quoted value may span several physical lines
+            lines = range(last_line + 1, reader.line_num + 1)
+            last_line = reader.line_num
+            if bad_lines.intersection(lines):
+                yield row_number, ValueError('Row is not valid UTF-8')
+                continue
+            yield row_number, {key: value for key, value in record.items() if key is not None}
+    except csv.Error as e:
+        yield reader.line_num, ValueError(f'Invalid CSV: {e}')
+
+def import_assets(owner_id, rows, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and insert streamed rows in batched transactions.
+
+    Only one batch of validated rows is held in memory at a time. Returns a report
+    with the created/failed counts and the first MAX_REPORTED_ERRORS row errors.
+    """
+    report = {'created': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+    batch, batch_rows = [], []
+
+    def record_error(row_number, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'error': message})
+        else:
+            report['errors_truncated'] = True
+
+    def insert_rows_individually():
+        # One savepoint per row, so a bad row fails alone; database errors are not echoed back
+        created = 0
+        for row_number, values in zip(batch_rows, batch):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(Asset), [values])
+                created += 1
+            except Exception as e:
+                print(f"[IMPORT ASSETS] Row {row_number} failed: {e}")
+                record_error(row_number, 'Row could not be inserted')
+        if created:
+            mark_catalog_changed(db.session)
+        db.session.commit()
+        report['created'] += created
+
+    def flush_batch():
+        if not batch:
+            return
+        try:
+            db.session.execute(db.insert(Asset), batch)
+            # Bulk inserts bypass the ORM flush events that normally invalidate the catalog cache
+            mark_catalog_changed(db.session)
+            db.session.commit()
+            report['created'] += len(batch)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[IMPORT ASSETS] Batch insert failed, retrying row by row: {e}")
+            insert_rows_individually()
+        batch.clear()
+        batch_rows.clear()
+
+    for row_number, data in rows:
+        if isinstance(data, Exception):
+            record_error(row_number, str(data))
+            continue
+        try:
+            batch.append(parse_asset_fields(data, owner_id))
+            batch_rows.append(row_number)
+        except ValueError as e:
+            record_error(row_number, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush_batch()
+    flush_batch()
+    return report
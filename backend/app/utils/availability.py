@@ -0,0 +1,121 @@
+import bisect
+import threading
+from datetime import date, time, timedelta
+from flask import current_app, has_app_context
+from app import db
+from app.models.booking import Booking, ACTIVE_BOOKING_STATUSES
+from app.utils.cache import LRUCache
+from app.utils.cache_sync import mark_changed, register_cache, sync_shared_caches
+from app.utils.session_hooks import collect_flushed
+
+MAX_CALENDAR_DAYS = 366
+DEFAULT_CALENDAR_DAYS = 90
+
+def booking_days(start_date, end_date):
+    """Half-open range of day ordinals [first, last) touched by a booking"""
+    last = end_date.date()
+    if end_date.time() != time.min:
+        last += timedelta(days=1)
+    return start_date.date().toordinal(), max(last.toordinal(), start_date.date().toordinal() + 1)
+
+def merge_day_ranges(ranges):
+    """Sort and coalesce overlapping or adjacent [first, last) day ranges"""
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return [tuple(day_range) for day_range in merged]
+
+class AvailabilityCache:
+    """Per-asset occupancy (merged busy day ranges), invalidated when the asset's bookings change.
+
+    Entries follow the shared 'bookings' version, so bookings changed by other
+    workers or CLI commands are picked up within CACHE_SYNC_INTERVAL.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.generation = 0
+        self._occupancy = LRUCache(max_entries=max_entries, max_bytes=max_entries * 1024)
+        self._lock = threading.Lock()
+
+    def occupancy(self, asset_id):
+        sync_shared_caches()
+        cached = self._occupancy.get(asset_id)
+        if cached is not None:
+            return cached
+
+        # A booking committed while the query runs bumps the generation; don't cache stale data
+        generation = self.generation
+        rows = db.session.query(Booking.start_date, Booking.end_date).filter(
+            Booking.asset_id == asset_id,
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES)
+        ).all()
+        occupancy = merge_day_ranges(booking_days(start, end) for start, end in rows)
+        with self._lock:
+            if generation == self.generation:
+                self._occupancy.set(asset_id, occupancy, size=len(occupancy) + 1)
+        return occupancy
+
+    def invalidate(self, asset_ids=None):
+        """Drop cached occupancy for the given assets, or for every asset"""
+        with self._lock:
+            self.generation += 1
+            if asset_ids is None:
+                self._occupancy.clear()
+            else:
+                for asset_id in asset_ids:
+                    self._occupancy.delete(asset_id)
+
+    def stats(self):
+        stats = self._occupancy.stats()
+        stats['generation'] = self.generation
+        return stats
+
+def init_availability_cache(app):
+    app.extensions['availability_cache'] = AvailabilityCache(
+        max_entries=app.config.get('AVAILABILITY_CACHE_MAX_ENTRIES', 4096)
+    )
+
+def get_availability_cache():
+    return current_app.extensions['availability_cache']
+
+def invalidate_availability(asset_ids=None):
+    """Drop this process's cached calendars for the given assets, or for every asset"""
+    if has_app_context() and 'availability_cache' in current_app.extensions:
+        get_availability_cache().invalidate(asset_ids)
+
+def mark_availability_changed(session, asset_ids):
+    """Have the session's commit drop these assets' cached occupancy in all processes"""
+    mark_changed(session, 'bookings', asset_ids)
+
+def occupancy_calendar(asset_id, first_day, last_day):
+    """Day-level occupancy of an asset from first_day to last_day inclusive.
+
+    Returns a '0'/'1' string with one character per day and the busy days as
+    inclusive [start, end] ISO date ranges.
+    """
+    occupancy = get_availability_cache().occupancy(asset_id)
+    window_first, window_last = first_day.toordinal(), last_day.toordinal() + 1
+
+    bitmap = ['0'] * (window_last - window_first)
+    busy_ranges = []
+    # Ranges are sorted and disjoint: start from the last one beginning at or before the window
+    index = max(bisect.bisect_right(occupancy, (window_first, float('inf'))) - 1, 0)
+    for first, last in occupancy[index:]:
+        if first >= window_last:
+            break
+        first, last = max(first, window_first), min(last, window_last)
+        if first >= last:
+            continue
+        bitmap[first - window_first:last - window_first] = ['1'] * (last - first)
+        busy_ranges.append([date.fromordinal(first).isoformat(), date.fromordinal(last - 1).isoformat()])
+    return ''.join(bitmap), busy_ranges
+
+register_cache('bookings', invalidate_availability)
+
+@collect_flushed
+def _track_booking_assets(session, instance):
+    if isinstance(instance, Booking) and instance.asset_id is not None:
+        mark_changed(session, 'bookings', (instance.asset_id,))
@@ -0,0 +1,78 @@
+from collections import Counter
+from datetime import datetime
+from app import db
+from app.models.booking import Booking, BookingStatus, adjust_booking_counts
+from app.utils.availability import mark_availability_changed
+from app.utils.catalog_cache import mark_rankings_changed
+
+MAINTENANCE_BATCH_SIZE = 500
+
+def _in_batches(criteria, statement_for, batch_size, before_commit=None):
+    """Apply a set-based statement to matching bookings batch_size rows per transaction.
+    
+    Returns the number of rows processed. Each batch commits on its own so the
+    write lock is only held for one short statement at a time. The statements
+    bypass the flush hooks, so each batch bumps the shared 'bookings' cache
+    version itself; that is what reaches the web workers' caches when this runs
+    from the CLI. before_commit(asset_ids) gets the asset id of every changed
+    row, inside the batch's transaction.
+    """
+    processed = 0
+    while True:
+        rows = db.session.query(Booking.id, Booking.asset_id).filter(*criteria).order_by(Booking.id).limit(batch_size).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        # Criteria are repeated so rows changed since the SELECT are left alone
+        changed = db.session.execute(
+            statement_for(db.and_(Booking.id.in_(ids), *criteria))
+            .returning(Booking.asset_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if changed:
+            mark_availability_changed(db.session, changed)
+            if before_commit is not None:
+                before_commit(changed)
+        db.session.commit()
+        processed += len(changed)
+        if len(rows) < batch_size:
+            break
+    return processed
+
+def expire_pending_bookings(now=None, client_id=None, owner_id=None, batch_size=MAINTENANCE_BATCH_SIZE):
+    """Delete pending bookings whose start date has passed; returns the number deleted"""
+    criteria = [Booking.status == BookingStatus.PENDING, Booking.start_date < (now or datetime.now())]
+    if client_id is not None:
+        criteria.append(Booking.client_id == client_id)
+    if owner_id is not None:
+        criteria.append(Booking.owner_id == owner_id)
+    
+    def release_counts(asset_ids):
+        # Deleted pending bookings no longer count towards the assets' popularity
+        adjust_booking_counts(db.session, {asset_id: -count for asset_id, count in Counter(asset_ids).items()})
+        mark_rankings_changed(db.session)
+    
+    deleted = _in_batches(
+        criteria, lambda where: db.delete(Booking).where(where), batch_size, before_commit=release_counts
+    )
+    return deleted
+
+def complete_past_bookings(now=None, batch_size=MAINTENANCE_BATCH_SIZE):
+    """Mark confirmed bookings whose end date has passed as completed; returns the number updated"""
+    now = now or datetime.now()
+    criteria = [Booking.status == BookingStatus.CONFIRMED, Booking.end_date < now]
+    
+    completed = _in_batches(
+        criteria,
+        lambda where: db.update(Booking).where(where).values(status=BookingStatus.COMPLETED, updated_at=datetime.utcnow()),
+        batch_size
+    )
+    return completed
+
+def run_booking_maintenance(now=None, batch_size=MAINTENANCE_BATCH_SIZE):
+    """Expire stale pending bookings and complete finished ones; returns counts per action"""
+    now = now or datetime.now()
+    return {
+        'expired': expire_pending_bookings(now=now, batch_size=batch_size),
+        'completed': complete_past_bookings(now=now, batch_size=batch_size)
+    }
@@ -0,0 +1,103 @@
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from flask import current_app, has_app_context
+from app import db
+from app.models.cache_version import CacheVersion
+from app.utils.session_hooks import defer, on_commit
+
+# name -> [invalidate(keys)]; keys is the set of changed keys, or None for everything
+_invalidators = {}
+
+class CacheSync:
+    """This process's view of the shared cache_versions counters.
+
+    A commit that changes cached data bumps the counter of that data right
+    afterwards, in a short transaction of its own: doing it inside the writing
+    transaction would make every writer queue on the same counter row. Before a
+    cache is read, the counters are re-read (at most every poll_seconds); caches
+    whose counter was moved by another process, such as another worker or a CLI
+    command, are dropped entirely.
+    """
+
+    def __init__(self, poll_seconds=1.0):
+        self.poll_seconds = poll_seconds
+        self._seen = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Names whose counter changed outside this process since the last check"""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.poll_seconds:
+            return []
+
+        table = CacheVersion.__table__
+        versions = dict(db.session.execute(db.select(table.c.name, table.c.version)).all())
+        with self._lock:
+            self._checked_at = now
+            if self._seen is None:
+                # First check: nothing has been cached yet
+                self._seen = versions
+                return []
+            changed = [name for name in set(versions) | set(self._seen) if versions.get(name) != self._seen.get(name)]
+            self._seen.update(versions)
+            return changed
+
+    def acknowledge(self, name, version):
+        """Record a bump committed by this process, whose changes it already invalidated itself"""
+        with self._lock:
+            if self._seen is not None and self._seen.get(name, 0) == version - 1:
+                self._seen[name] = version
+
+def init_cache_sync(app):
+    app.extensions['cache_sync'] = CacheSync(poll_seconds=app.config.get('CACHE_SYNC_INTERVAL', 1.0))
+
+def sync_shared_caches(force=False):
+    """Invalidate local caches whose data another process changed; call before reading a cache"""
+    if not has_app_context() or 'cache_sync' not in current_app.extensions:
+        return
+    for name in current_app.extensions['cache_sync'].refresh(force=force):
+        for invalidate in _invalidators.get(name, ()):
+            invalidate(None)
+
+def _bump_version(name):
+    """Advance the shared counter in its own transaction; returns the new version"""
+    table = CacheVersion.__table__
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(name=name, version=1, updated_at=now))
+        return connection.execute(db.select(table.c.version).where(table.c.name == name)).scalar()
+
+def _changes_committed(name, values):
+    keys = None if None in values else set().union(*values)
+    for invalidate in _invalidators.get(name, ()):
+        invalidate(keys)
+    if not has_app_context() or 'cache_sync' not in current_app.extensions:
+        return
+    try:
+        version = _bump_version(name)
+    except Exception as e:
+        # The data is committed either way; other processes catch up with the next bump
+        print(f"[CACHE SYNC] Could not bump the '{name}' version: {e}")
+        return
+    current_app.extensions['cache_sync'].acknowledge(name, version)
+
+def register_cache(name, invalidate):
+    """Call invalidate(keys) whenever data cached under name changes, in this process or another"""
+    if name not in _invalidators:
+        on_commit(name, partial(_changes_committed, name))
+    _invalidators.setdefault(name, []).append(invalidate)
+
+def mark_changed(session, name, keys=None):
+    """Record that the session's transaction changes data cached under name.
+
+    keys limits local invalidation to those entries (an empty iterable changes
+    nothing locally but still bumps the shared counter); None means everything.
+    """
+    defer(session, name, None if keys is None else frozenset(keys))
@@ -0,0 +1,128 @@
+import threading
+from flask import current_app, has_app_context
+from app.utils.cache import LRUCache
+from app.utils.cache_sync import mark_changed, register_cache, sync_shared_caches
+from app.utils.session_hooks import collect_flushed
+
+class CatalogCache:
+    """Caches serialized catalog responses, invalidated by a catalog version counter.
+
+    Responses that depend on bookings (date-range availability) also carry the
+    availability version, and responses that sort by or show the ranking
+    counters carry the ranking version, so booking and review writes only
+    invalidate those entries. The counters follow the shared 'assets',
+    'bookings' and 'rankings' versions, so writes made by other processes
+    invalidate this one's entries too.
+    """
+
+    def __init__(self, enabled=True, max_entries=512, max_bytes=32 * 1024 * 1024):
+        self.enabled = enabled
+        self.version = 0
+        self.availability_version = 0
+        self.ranking_version = 0
+        self._results = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+
+    def make_key(self, scope, args, availability=False, ranking=False):
+        """Normalize a query string into a hashable key; parameter order does not matter"""
+        if self.enabled:
+            sync_shared_caches()
+        params = tuple(sorted(
+            (name, tuple(value.strip() for value in values))
+            for name, values in args.lists()
+        ))
+        return (
+            self.version,
+            self.availability_version if availability else None,
+            self.ranking_version if ranking else None,
+            scope,
+            params
+        )
+
+    def _is_current(self, key):
+        return key[0] == self.version and key[1] in (None, self.availability_version) \
+            and key[2] in (None, self.ranking_version)
+
+    def get(self, key):
+        if not self.enabled or not self._is_current(key):
+            return None
+        return self._results.get(key)
+
+    def set(self, key, body):
+        if self.enabled and self._is_current(key):
+            self._results.set(key, body, size=len(body))
+
+    def bump(self):
+        """Invalidate every cached response after a catalog write"""
+        with self._lock:
+            self.version += 1
+            self._results.clear()
+
+    def bump_availability(self):
+        """Invalidate availability-dependent responses; stale entries age out of the LRU"""
+        with self._lock:
+            self.availability_version += 1
+
+    def bump_rankings(self):
+        """Invalidate responses ordered by or showing rating and popularity counters"""
+        with self._lock:
+            self.ranking_version += 1
+
+    def stats(self):
+        stats = self._results.stats()
+        stats.update({
+            'enabled': self.enabled,
+            'version': self.version,
+            'availability_version': self.availability_version,
+            'ranking_version': self.ranking_version
+        })
+        return stats
+
+def init_catalog_cache(app):
+    app.extensions['catalog_cache'] = CatalogCache(
+        enabled=app.config.get('ASSET_CACHE_ENABLED', True),
+        max_entries=app.config.get('ASSET_CACHE_MAX_ENTRIES', 512),
+        max_bytes=app.config.get('ASSET_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    )
+
+def get_catalog_cache():
+    return current_app.extensions['catalog_cache']
+
+def bump_catalog_version():
+    """Drop this process's cached catalog responses"""
+    if has_app_context() and 'catalog_cache' in current_app.extensions:
+        get_catalog_cache().bump()
+
+def bump_availability_version():
+    """Invalidate cached responses filtered by booking availability"""
+    if has_app_context() and 'catalog_cache' in current_app.extensions:
+        get_catalog_cache().bump_availability()
+
+def bump_ranking_version():
+    """Invalidate cached responses that depend on the ranking counters"""
+    if has_app_context() and 'catalog_cache' in current_app.extensions:
+        get_catalog_cache().bump_rankings()
+
+def mark_catalog_changed(session):
+    """Flag the session so its commit invalidates the catalog cache in every process.
+
+    Needed where assets are written with set-based statements that the flush
+    hooks never see.
+    """
+    mark_changed(session, 'assets')
+
+def mark_rankings_changed(session):
+    """Have the session's commit drop only ranking-dependent catalog responses, in every process"""
+    mark_changed(session, 'rankings')
+
+register_cache('assets', lambda keys: bump_catalog_version())
+register_cache('bookings', lambda keys: bump_availability_version())
+register_cache('rankings', lambda keys: bump_ranking_version())
+
+@collect_flushed
+def _track_catalog_changes(session, instance):
+    from app.models.asset import Asset, AssetImage
+
+    # Booking changes are marked by the availability cache, which also follows 'bookings'
+    if isinstance(instance, (Asset, AssetImage)):
+        mark_changed(session, 'assets')
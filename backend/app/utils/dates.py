@@ -0,0 +1,7 @@
+from datetime import datetime
+
+def parse_iso_datetime(value):
+    """Parse an ISO 8601 date or datetime string, accepting a trailing 'Z'"""
+    if not isinstance(value, str):
+        raise ValueError('Invalid date format')
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
@@ -0,0 +1,79 @@
+import mimetypes
+import os
+import re
+from flask import current_app, make_response, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from app.utils.file_upload import is_sharded, locate_upload
+from app.utils.image_processing import IMAGE_VARIANTS, variant_filename
+
+# uuid4 hex (legacy) and SHA-256 names are never rewritten with different content
+IMMUTABLE_NAME_PATTERN = re.compile(r'^(?:[0-9a-f]{32}|[0-9a-f]{64})(?:_[a-z]+)?\.[a-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60 * 60
+# An original served in place of a derivative that is still being generated
+FALLBACK_MAX_AGE = 60
+
+def is_immutable_name(filename):
+    return IMMUTABLE_NAME_PATTERN.match(os.path.basename(filename)) is not None
+
+def _cache_max_age(immutable, fallback=False):
+    if fallback:
+        return FALLBACK_MAX_AGE
+    return IMMUTABLE_MAX_AGE if immutable else MUTABLE_MAX_AGE
+
+def _apply_cache_headers(response, immutable, fallback=False):
+    response.cache_control.public = True
+    response.cache_control.max_age = _cache_max_age(immutable, fallback)
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+def _offload_response(filename, uri_prefix, immutable, fallback=False):
+    """Empty response telling nginx to serve the file from an internal location"""
+    response = make_response('')
+    response.headers['X-Accel-Redirect'] = uri_prefix.rstrip('/') + '/' + filename
+    response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if immutable:
+        response.set_etag(os.path.basename(filename))
+    return _apply_cache_headers(response, immutable, fallback)
+
+def serve_upload(directory, filename, size=None):
+    """Serve an uploaded file with long-lived caching, conditional and Range support.
+
+    filename may be a sharded path (ab/cd/name) or a legacy flat name, which is
+    looked up in its shard first. ?size= selects a stored derivative, falling
+    back to the original, cached only briefly so the derivative is picked up
+    once generated. With UPLOAD_OFFLOAD='x-accel' the bytes are handed to the
+    front proxy; with 'x-sendfile' Flask's USE_X_SENDFILE does the same for
+    Apache/lighttpd.
+    """
+    if safe_join(directory, filename) is None:
+        raise NotFound()
+
+    stored = None
+    if size in IMAGE_VARIANTS:
+        stored = locate_upload(directory, variant_filename(filename, size))
+    # The derivative may not be generated yet: the original stands in only until it is
+    fallback = size in IMAGE_VARIANTS and stored is None
+    if stored is None and not is_sharded(filename):
+        stored = locate_upload(directory, filename)
+        if stored is None:
+            raise NotFound()
+    filename = stored or filename
+
+    immutable = is_immutable_name(filename) and not fallback
+    if current_app.config.get('UPLOAD_OFFLOAD') == 'x-accel':
+        return _offload_response(
+            filename, current_app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/assets'), immutable, fallback
+        )
+
+    # send_file answers If-None-Match/If-Modified-Since with 304 and Range with 206;
+    # names that can never change content get the filename as a strong ETag
+    response = send_from_directory(
+        directory, filename,
+        etag=os.path.basename(filename) if immutable else True,
+        conditional=True,
+        max_age=_cache_max_age(immutable, fallback)
+    )
+    return _apply_cache_headers(response, immutable, fallback)
@@ -1,45 +1,186 @@
+import hashlib
 import os
+import re
+import threading
 import uuid
-from werkzeug.utils import secure_filename
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: the store lock only covers this process
+    fcntl = None
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+ASSET_UPLOAD_FOLDER = 'uploads/assets'
+ASSET_URL_PREFIX = '/uploads/assets/'
+UPLOAD_SESSION_FOLDER = 'uploads/sessions'
+CHUNK_SIZE = 64 * 1024
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+SNIFF_BYTES = 16
+# Next to the upload folder, so the sweeper never sees it
+STORE_LOCK_NAME = '.store.lock'
+
+# extension -> (offset, bytes) pairs that must all match within the first SNIFF_BYTES
+IMAGE_SIGNATURES = (
+    ('png', ((0, b'\x89PNG\r\n\x1a\n'),)),
+    ('jpg', ((0, b'\xff\xd8\xff'),)),
+    ('gif', ((0, b'GIF87a'),)),
+    ('gif', ((0, b'GIF89a'),)),
+    ('webp', ((0, b'RIFF'), (8, b'WEBP'))),
+)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def save_uploaded_file(file, upload_folder):
-    """Save uploaded file and return the filename"""
-    if file and allowed_file(file.filename):
-        # Generate unique filename
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4().hex}.{ext}"
-        
-        # Get the absolute path to the backend directory
-        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        full_upload_path = os.path.join(backend_dir, upload_folder)
-        
-        # Create upload folder if it doesn't exist
-        os.makedirs(full_upload_path, exist_ok=True)
-        
-        # Full file path
-        filepath = os.path.join(full_upload_path, filename)
+def resolve_upload_folder(upload_folder):
+    """Absolute path of an upload folder given relative to the backend directory"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(backend_dir, upload_folder)
+
+def sharded_name(filename):
+    """Path of a stored file relative to its upload folder: ab/cd/abcd1234.jpg"""
+    return f'{filename[:2]}/{filename[2:4]}/{filename}'
+
+def is_sharded(relative_path):
+    return '/' in relative_path
+
+def relative_upload_path(image_url):
+    """Path below the asset upload folder that an /uploads/assets/ URL points to"""
+    if image_url.startswith(ASSET_URL_PREFIX):
+        return image_url[len(ASSET_URL_PREFIX):]
+    return image_url.rsplit('/', 1)[-1]
+
+def locate_upload(directory, relative_path):
+    """Relative path under which a file is actually stored, or None.
+
+    Flat names from URLs issued before the sharded layout are looked up in their
+    shard first and then at the top level, so old links keep working while the
+    migration command moves files.
+    """
+    candidates = [relative_path] if is_sharded(relative_path) else [sharded_name(relative_path), relative_path]
+    for candidate in candidates:
+        if os.path.isfile(os.path.join(directory, candidate)):
+            return candidate
+    return None
+
+def asset_image_path(image_url):
+    """Absolute path of the stored original for an AssetImage URL (sharded or legacy flat)"""
+    directory = resolve_upload_folder(ASSET_UPLOAD_FOLDER)
+    relative_path = relative_upload_path(image_url)
+    return os.path.join(directory, locate_upload(directory, relative_path) or relative_path)
+
+def session_part_path(session_id):
+    """Absolute path of the partial file a resumable upload session writes into"""
+    return os.path.join(resolve_upload_folder(UPLOAD_SESSION_FOLDER), f'{session_id}.part')
+
+def content_hash_from_filename(filename):
+    """The SHA-256 digest a content-addressed filename was stored under, or None"""
+    stem = filename.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    return stem if CONTENT_HASH_PATTERN.match(stem) else None
+
+_store_thread_lock = threading.Lock()
+
+@contextmanager
+def store_lock(full_upload_path):
+    """Serialize reusing and deleting stored files, across threads and processes.
+
+    Holders must not wait on database write locks: upload requests take it while
+    their transaction may already be writing.
+    """
+    with _store_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        lock_path = os.path.join(os.path.dirname(full_upload_path.rstrip(os.sep)), STORE_LOCK_NAME)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def store_stream(stream, upload_folder, ext):
+    """Write a binary stream to disk under its SHA-256 digest; returns (relative_path, is_new).
+
+    The content is hashed while it is written to a temporary file in the same folder,
+    which is then atomically renamed into its shard (ab/cd/<digest>.<ext>). Identical
+    content maps to the same path, so a re-upload keeps the existing blob and the
+    temporary copy is discarded.
+    """
+    full_upload_path = resolve_upload_folder(upload_folder)
+    os.makedirs(full_upload_path, exist_ok=True)
+    
+    temp_path = os.path.join(full_upload_path, f'.upload-{uuid.uuid4().hex}.part')
+    digest = hashlib.sha256()
+    try:
+        with open(temp_path, 'wb') as temp_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                temp_file.write(chunk)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
         
-        print(f"[FILE_UPLOAD] Backend dir: {backend_dir}")
-        print(f"[FILE_UPLOAD] Upload folder: {upload_folder}")
-        print(f"[FILE_UPLOAD] Full upload path: {full_upload_path}")
-        print(f"[FILE_UPLOAD] Saving file to: {filepath}")
+        return _move_into_store(temp_path, digest.hexdigest(), full_upload_path, ext)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def store_file(path, upload_folder, ext):
+    """Move a fully written file into content-addressed storage; returns (relative_path, is_new)"""
+    full_upload_path = resolve_upload_folder(upload_folder)
+    os.makedirs(full_upload_path, exist_ok=True)
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return _move_into_store(path, digest.hexdigest(), full_upload_path, ext)
+
+def _move_into_store(temp_path, hexdigest, full_upload_path, ext):
+    with store_lock(full_upload_path):
+        existing = locate_upload(full_upload_path, f"{hexdigest}.{ext}")
+        if existing:
+            os.remove(temp_path)
+            # Restarts the grace periods of the garbage collector for the reused file
+            os.utime(os.path.join(full_upload_path, existing))
+            return existing, False
         
-        # Save the file
-        file.save(filepath)
+        relative_path = sharded_name(f"{hexdigest}.{ext}")
+        filepath = os.path.join(full_upload_path, relative_path)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        os.replace(temp_path, filepath)
+        return relative_path, True
+
+def sniff_image_type(header):
+    """File extension for the image format identified by its leading bytes, or None"""
+    for ext, parts in IMAGE_SIGNATURES:
+        if all(header[offset:offset + len(magic)] == magic for offset, magic in parts):
+            return ext
+    return None
+
+def save_uploaded_file(file, upload_folder):
+    """Save uploaded file under its content hash and return its path relative to the upload folder"""
+    if file and allowed_file(file.filename):
+        # The extension comes from the content, so .jpg and .jpeg copies share one blob
+        ext = sniff_image_type(file.stream.read(SNIFF_BYTES))
+        file.stream.seek(0)
+        if ext is None:
+            print(f"[FILE_UPLOAD] Not a supported image: {file.filename}")
+            return None
+        filename, is_new = store_stream(file.stream, upload_folder, ext)
         
-        # Verify file was saved
-        if os.path.exists(filepath):
-            file_size = os.path.getsize(filepath)
-            print(f"[FILE_UPLOAD] File saved successfully: {filename} ({file_size} bytes)")
-            return filename
+        if is_new:
+            print(f"[FILE_UPLOAD] File saved successfully: {filename}")
         else:
-            print(f"[FILE_UPLOAD] ERROR: File was not saved!")
-            return None
+            print(f"[FILE_UPLOAD] Identical file already stored, reusing: {filename}")
+        return filename
     
     print(f"[FILE_UPLOAD] File not allowed or invalid: {file.filename if file else 'No file'}")
-    return None
\ No newline at end of file
+    return None
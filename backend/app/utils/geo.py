@@ -0,0 +1,103 @@
+import math
+import sqlite3
+from sqlalchemy import and_, column, event, func, or_, select, table
+from sqlalchemy.engine import Engine
+from app import db
+from app.models.asset import Asset
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_RADIUS_KM = 5000
+
+assets_geo = table('assets_geo', column('id'), column('min_lat'), column('max_lat'), column('min_lng'), column('max_lng'))
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres between two points"""
+    if lat1 is None or lng1 is None or lat2 is None or lng2 is None:
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+@event.listens_for(Engine, 'connect')
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    # Expose haversine_km() to SQL so distances can be filtered and sorted in the query
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('haversine_km', 4, haversine_km, deterministic=True)
+
+def _is_sqlite():
+    return db.engine.dialect.name == 'sqlite'
+
+def _wrap_longitude(lng):
+    if lng < -180:
+        return lng + 360
+    if lng > 180:
+        return lng - 360
+    return lng
+
+def bounding_box(lat, lng, radius_km):
+    """Smallest (min_lat, min_lng, max_lat, max_lng) box containing the radius.
+
+    When the box crosses the antimeridian min_lng is greater than max_lng.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if max_lat >= 90.0 or min_lat <= -90.0 or cos_lat <= 1e-9:
+        return min_lat, -180.0, max_lat, 180.0
+    dlng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if dlng >= 180:
+        return min_lat, -180.0, max_lat, 180.0
+    return min_lat, _wrap_longitude(lng - dlng), max_lat, _wrap_longitude(lng + dlng)
+
+def parse_bbox(value):
+    """Parse a 'min_lng,min_lat,max_lng,max_lat' bounding box string"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('bbox must be min_lng,min_lat,max_lng,max_lat')
+    if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise ValueError('bbox is out of range')
+    return min_lat, min_lng, max_lat, max_lng
+
+def _box_condition(lat_low, lat_high, lng_low, lng_high, min_lat, min_lng, max_lat, max_lng):
+    lat_condition = and_(lat_high >= min_lat, lat_low <= max_lat)
+    if min_lng <= max_lng:
+        lng_condition = and_(lng_high >= min_lng, lng_low <= max_lng)
+    else:
+        lng_condition = or_(lng_high >= min_lng, lng_low <= max_lng)
+    return and_(lat_condition, lng_condition)
+
+def apply_bbox_filter(query, min_lat, min_lng, max_lat, max_lng):
+    """Restrict an Asset query to coordinates inside the box, prefiltered by the spatial index"""
+    if _is_sqlite():
+        # R*Tree stores 32-bit floats rounded outwards, so it only narrows the candidates
+        candidates = select(assets_geo.c.id).where(_box_condition(
+            assets_geo.c.min_lat, assets_geo.c.max_lat, assets_geo.c.min_lng, assets_geo.c.max_lng,
+            min_lat, min_lng, max_lat, max_lng
+        )).subquery('geo_candidates')
+        query = query.join(candidates, candidates.c.id == Asset.id)
+    return query.filter(_box_condition(
+        Asset.latitude, Asset.latitude, Asset.longitude, Asset.longitude,
+        min_lat, min_lng, max_lat, max_lng
+    ))
+
+def distance_expression(lat, lng):
+    """SQL expression for the distance in kilometres from (lat, lng) to each asset"""
+    if _is_sqlite():
+        return func.haversine_km(lat, lng, Asset.latitude, Asset.longitude)
+    phi1 = math.radians(lat)
+    phi2 = func.radians(Asset.latitude)
+    a = (
+        func.power(func.sin((phi2 - phi1) / 2), 2)
+        + math.cos(phi1) * func.cos(phi2) * func.power(func.sin((func.radians(Asset.longitude) - math.radians(lng)) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+def apply_radius_filter(query, lat, lng, radius_km):
+    """Restrict an Asset query to assets within radius_km, returning (query, distance)"""
+    query = apply_bbox_filter(query, *bounding_box(lat, lng, radius_km))
+    distance = distance_expression(lat, lng)
+    return query.filter(distance <= radius_km), distance
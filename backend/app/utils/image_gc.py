@@ -0,0 +1,227 @@
+import os
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from app import db
+from app.models.asset import AssetImage, ImageBlob
+from app.models.upload import UploadSession
+from app.utils.file_upload import (
+    ALLOWED_EXTENSIONS, ASSET_UPLOAD_FOLDER, ASSET_URL_PREFIX, UPLOAD_SESSION_FOLDER, locate_upload,
+    relative_upload_path, resolve_upload_folder, store_lock
+)
+from app.utils.image_processing import IMAGE_VARIANTS, VARIANT_FORMAT
+from app.utils.session_hooks import defer, on_commit
+
+# Files younger than this are left alone: they may belong to an upload whose row is not committed yet
+DEFAULT_GRACE_SECONDS = 24 * 60 * 60
+# Released files touched this recently were reused by an upload that may not have committed yet
+REUSE_GRACE_SECONDS = 10 * 60
+SWEEP_BATCH_SIZE = 500
+
+def _remove(directory, relative_path):
+    try:
+        os.remove(os.path.join(directory, relative_path))
+        return True
+    except FileNotFoundError:
+        return False
+
+def _image_files(directory, image_url, variants):
+    """Stored original and derivatives of an image, as paths relative to the upload folder"""
+    relative_path = relative_upload_path(image_url)
+    original = locate_upload(directory, relative_path) or relative_path
+    base = os.path.dirname(original)
+    return [original] + [os.path.join(base, name) for name in set((variants or {}).values())]
+
+def _still_used(directory, image_url, content_hash):
+    """Whether a released image's files were taken up again; checked under the store lock"""
+    if content_hash:
+        # A re-upload of the same content registered a new blob row
+        if db.session.get(ImageBlob, content_hash, populate_existing=True) is not None:
+            return True
+    elif db.session.query(AssetImage.id).filter_by(image_url=image_url).first() is not None:
+        return True
+    # ... or reused the file and has not committed its AssetImage yet
+    original = locate_upload(directory, relative_upload_path(image_url))
+    return original is not None and os.stat(os.path.join(directory, original)).st_mtime > time.time() - REUSE_GRACE_SECONDS
+
+def delete_released_files(released):
+    """Delete the files of removed images once nothing references them any more.
+
+    released holds (image_url, content_hash, variants) tuples captured when the
+    AssetImage rows were deleted. Shared content-addressed files are only removed
+    after their blob row is dropped at ref_count 0, and then only if no upload
+    reused them meanwhile; anything skipped is left for the sweeper.
+    """
+    directory = resolve_upload_folder(ASSET_UPLOAD_FOLDER)
+    removed = 0
+    for image_url, content_hash, variants in released:
+        if content_hash:
+            result = db.session.execute(
+                db.delete(ImageBlob).where(ImageBlob.digest == content_hash, ImageBlob.ref_count <= 0)
+            )
+            db.session.commit()
+            if result.rowcount == 0:
+                continue
+        with store_lock(directory):
+            if _still_used(directory, image_url, content_hash):
+                continue
+            for relative_path in _image_files(directory, image_url, variants):
+                removed += _remove(directory, relative_path)
+    if removed:
+        print(f"[IMAGE GC] Removed {removed} files of deleted images")
+
+@event.listens_for(AssetImage, 'after_delete')
+def _release_image_files(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        defer(session, 'released_images', (target.image_url, target.content_hash, target.variants))
+
+def _queue_released_files(released):
+    if not has_app_context() or 'image_worker' not in current_app.extensions:
+        return
+    # The sweeper picks these up later if the pool is saturated
+    if not current_app.extensions['image_worker'].submit(delete_released_files, released):
+        print(f"[IMAGE GC] Worker pool full; leaving {len(released)} images for the sweeper")
+
+on_commit('released_images', _queue_released_files)
+
+def _original_candidates(filename):
+    """URL tails (relative to the upload folder) of the originals a stored file may belong to"""
+    stem, ext = os.path.splitext(filename)
+    candidates = [filename]
+    if ext == f'.{VARIANT_FORMAT}':
+        for variant in IMAGE_VARIANTS:
+            if stem.endswith(f'_{variant}'):
+                original_stem = stem[:-len(variant) - 1]
+                candidates.extend(f'{original_stem}.{original_ext}' for original_ext in ALLOWED_EXTENSIONS)
+    return candidates
+
+def _touched_since(directory, relative_path, cutoff):
+    try:
+        return os.stat(os.path.join(directory, relative_path)).st_mtime > cutoff
+    except FileNotFoundError:
+        return False
+
+def _sweep_batch(directory, batch, dry_run, cutoff):
+    urls = {}
+    for relative_path in batch:
+        base = os.path.dirname(relative_path)
+        for candidate in _original_candidates(os.path.basename(relative_path)):
+            # Legacy rows may still carry the flat URL of a file that has been sharded
+            for url_tail in {os.path.join(base, candidate), candidate}:
+                urls.setdefault(ASSET_URL_PREFIX + url_tail, []).append(relative_path)
+
+    referenced = set()
+    url_list = list(urls)
+    for start in range(0, len(url_list), SWEEP_BATCH_SIZE):
+        chunk = url_list[start:start + SWEEP_BATCH_SIZE]
+        for (image_url,) in db.session.query(AssetImage.image_url).filter(AssetImage.image_url.in_(chunk)):
+            referenced.update(urls[image_url])
+
+    orphans = [relative_path for relative_path in batch if relative_path not in referenced]
+    if not dry_run:
+        with store_lock(directory):
+            # An upload may have reused a file since it was scanned, restarting its grace period
+            orphans = [relative_path for relative_path in orphans if not _touched_since(directory, relative_path, cutoff)]
+            for relative_path in orphans:
+                _remove(directory, relative_path)
+    return orphans
+
+def sweep_orphaned_files(grace_seconds=DEFAULT_GRACE_SECONDS, batch_size=SWEEP_BATCH_SIZE, dry_run=False):
+    """Delete upload files no AssetImage refers to; returns (scanned, orphan paths).
+
+    Walks the upload folder, checking batch_size files per query against
+    AssetImage.image_url. Files modified within grace_seconds, including
+    temporary .part files of in-progress uploads, are skipped.
+    """
+    directory = resolve_upload_folder(ASSET_UPLOAD_FOLDER)
+    cutoff = time.time() - grace_seconds
+    scanned = 0
+    orphans = []
+    batch = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            scanned += 1
+            relative_path = os.path.relpath(path, directory)
+            if name.startswith('.'):
+                # Leftover temporary file from an interrupted upload
+                orphans.append(relative_path)
+                if not dry_run:
+                    _remove(directory, relative_path)
+                continue
+            batch.append(relative_path)
+            if len(batch) >= batch_size:
+                orphans.extend(_sweep_batch(directory, batch, dry_run, cutoff))
+                batch = []
+    if batch:
+        orphans.extend(_sweep_batch(directory, batch, dry_run, cutoff))
+
+    if not dry_run:
+        # Blob rows whose last reference went away while the file was already gone
+        db.session.execute(db.delete(ImageBlob).where(
+            ImageBlob.ref_count <= 0,
+            ImageBlob.updated_at < datetime.utcnow() - timedelta(seconds=grace_seconds)
+        ))
+        db.session.commit()
+    return scanned, orphans
+
+def sweep_upload_sessions(grace_seconds=DEFAULT_GRACE_SECONDS, dry_run=False):
+    """Expire idle upload sessions and delete partial files; returns (expired sessions, removed part files).
+
+    Open sessions past expires_at are marked 'expired', as are completions that
+    died before finishing. A .part file is removed once its session is neither
+    open nor completing, or after grace_seconds when it has no session row at
+    all (the row may not be committed yet, or its asset was deleted). Aborted
+    and expired rows older than grace_seconds are dropped.
+    """
+    now = datetime.utcnow()
+    active = ('open', 'completing')
+    expired_ids = [session_id for (session_id,) in db.session.query(UploadSession.id).filter(
+        UploadSession.status.in_(active), UploadSession.expires_at <= now
+    )]
+    if expired_ids and not dry_run:
+        for start in range(0, len(expired_ids), SWEEP_BATCH_SIZE):
+            db.session.execute(
+                db.update(UploadSession)
+                .where(UploadSession.id.in_(expired_ids[start:start + SWEEP_BATCH_SIZE]), UploadSession.status.in_(active))
+                .values(status='expired', chunk_lease_until=None)
+            )
+        db.session.commit()
+
+    directory = resolve_upload_folder(UPLOAD_SESSION_FOLDER)
+    removed = 0
+    if os.path.isdir(directory):
+        part_ids = {name[:-len('.part')]: name for name in os.listdir(directory) if name.endswith('.part')}
+        statuses = {}
+        ids = list(part_ids)
+        for start in range(0, len(ids), SWEEP_BATCH_SIZE):
+            statuses.update(db.session.query(UploadSession.id, UploadSession.status).filter(
+                UploadSession.id.in_(ids[start:start + SWEEP_BATCH_SIZE])
+            ))
+        cutoff = time.time() - grace_seconds
+        for session_id, name in part_ids.items():
+            status = statuses.get(session_id)
+            if status in active and session_id not in expired_ids:
+                continue
+            if status is None and _touched_since(directory, name, cutoff):
+                continue
+            removed += 1
+            if not dry_run:
+                _remove(directory, name)
+
+    if not dry_run:
+        db.session.execute(db.delete(UploadSession).where(
+            UploadSession.status.in_(('aborted', 'expired')),
+            UploadSession.updated_at < now - timedelta(seconds=grace_seconds)
+        ))
+        db.session.commit()
+    return len(expired_ids), removed
@@ -0,0 +1,109 @@
+import base64
+import io
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it only the original upload is stored
+    Image = None
+    ImageOps = None
+
+# Derivative name -> longest edge in pixels (never upscaled)
+IMAGE_VARIANTS = {
+    'thumb': 320,
+    'card': 800,
+    'full': 1600
+}
+VARIANT_FORMAT = 'webp'
+VARIANT_QUALITY = 80
+# Longest edge of the inline low-quality placeholder (LQIP) shown while an image loads
+PLACEHOLDER_EDGE = 16
+PLACEHOLDER_QUALITY = 40
+EXIF_ORIENTATION = 0x0112
+
+def images_supported():
+    return Image is not None
+
+def variant_filename(filename, variant):
+    """Name of a derivative stored next to the original, e.g. abc123_thumb.webp"""
+    stem = filename.rsplit('.', 1)[0]
+    return f'{stem}_{variant}.{VARIANT_FORMAT}'
+
+def _oriented_size(source):
+    """Display size of an opened image, honouring an EXIF rotation without decoding pixels"""
+    width, height = source.size
+    if source.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+        return height, width
+    return width, height
+
+def _normalized(source):
+    # Apply the EXIF orientation before resizing, then drop the metadata
+    image = ImageOps.exif_transpose(source)
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+def _placeholder(image):
+    """Tiny WebP data URI of the image, small enough to inline in listing responses"""
+    small = image.copy()
+    small.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE), Image.LANCZOS)
+    buffer = io.BytesIO()
+    small.save(buffer, VARIANT_FORMAT.upper(), quality=PLACEHOLDER_QUALITY)
+    return f'data:image/{VARIANT_FORMAT};base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def extract_metadata(original_path):
+    """Width, height, byte size and placeholder of a stored image; dimensions need Pillow"""
+    metadata = {'width': None, 'height': None, 'byte_size': os.path.getsize(original_path), 'placeholder': None}
+    if not images_supported():
+        return metadata
+
+    with Image.open(original_path) as source:
+        metadata['width'], metadata['height'] = _oriented_size(source)
+        # JPEGs can be decoded at a reduced scale; the placeholder only needs a few pixels
+        source.draft('RGB', (PLACEHOLDER_EDGE * 8, PLACEHOLDER_EDGE * 8))
+        metadata['placeholder'] = _placeholder(_normalized(source))
+    return metadata
+
+def process_image(original_path):
+    """Write resized WebP derivatives next to the original; returns ({variant: filename}, metadata).
+
+    The original is decoded once for both the derivatives and the metadata.
+    """
+    if not images_supported():
+        return {}, extract_metadata(original_path)
+
+    directory, filename = os.path.split(original_path)
+    variants = {}
+    with Image.open(original_path) as source:
+        image = _normalized(source)
+        metadata = {
+            'width': image.width,
+            'height': image.height,
+            'byte_size': os.path.getsize(original_path),
+            'placeholder': None
+        }
+
+        previous_size = previous_name = None
+        smallest = None
+        for variant, max_edge in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            if smallest is None:
+                smallest = resized
+            if resized.size == previous_size:
+                # Small originals: larger variants would be byte-identical, so share the file
+                variants[variant] = previous_name
+                continue
+            variant_name = variant_filename(filename, variant)
+            resized.save(os.path.join(directory, variant_name), VARIANT_FORMAT.upper(), quality=VARIANT_QUALITY, method=4)
+            variants[variant] = variant_name
+            previous_size, previous_name = resized.size, variant_name
+
+        metadata['placeholder'] = _placeholder(smallest if smallest is not None else image)
+
+    return variants, metadata
+
+def generate_variants(original_path):
+    """Write resized WebP derivatives next to the original; returns {variant: filename}"""
+    return process_image(original_path)[0]
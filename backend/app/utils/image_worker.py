@@ -0,0 +1,138 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app import db
+from app.models.asset import AssetImage
+from app.utils.file_upload import asset_image_path
+from app.utils.image_processing import process_image
+
+class ImageWorkerPool:
+    """Bounded thread pool for image work that should not block a request.
+
+    At most max_workers jobs run and max_queue more wait; submit() returns False
+    when the pool is full so the caller can apply backpressure.
+    """
+
+    def __init__(self, app, max_workers=2, max_queue=64):
+        self.app = app
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-worker')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._closed = False
+
+    def submit(self, fn, *args):
+        if self._closed or not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        self._executor.submit(self._run, fn, args)
+        return True
+
+    def _run(self, fn, args):
+        with self._lock:
+            self.started += 1
+        succeeded = False
+        try:
+            with self.app.app_context():
+                fn(*args)
+            succeeded = True
+        except Exception:
+            print(f"[IMAGE WORKER] Job {getattr(fn, '__name__', fn)}{args} failed")
+            traceback.print_exc()
+        finally:
+            self._slots.release()
+            with self._lock:
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._idle.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until every submitted job has finished; returns False on timeout"""
+        with self._lock:
+            return self._idle.wait_for(lambda: self.completed + self.failed >= self.submitted, timeout)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and, by default, finish the ones already queued"""
+        self._closed = True
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queue_depth': self.submitted - self.started,
+                'in_flight': self.started - self.completed - self.failed,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+
+def init_image_worker(app):
+    pool = ImageWorkerPool(
+        app,
+        max_workers=app.config.get('IMAGE_WORKERS', 2),
+        max_queue=app.config.get('IMAGE_QUEUE_MAX', 64)
+    )
+    app.extensions['image_worker'] = pool
+    return pool
+
+def get_image_worker():
+    return current_app.extensions['image_worker']
+
+def process_asset_image(image_id):
+    """Generate derivatives and metadata for one AssetImage and record the outcome on it"""
+    image = db.session.get(AssetImage, image_id)
+    if image is None:
+        return
+    
+    if image.content_hash:
+        # Another image with the same content already has derivatives on disk
+        processed_copy = AssetImage.query.filter(
+            AssetImage.content_hash == image.content_hash,
+            AssetImage.processing_status == 'ready',
+            AssetImage.variants.isnot(None),
+            AssetImage.id != image.id
+        ).first()
+        if processed_copy is not None:
+            image.variants = processed_copy.variants
+            image.set_metadata({field: getattr(processed_copy, field) for field in AssetImage.METADATA_FIELDS})
+            image.processing_status = 'ready'
+            db.session.commit()
+            return
+    
+    path = asset_image_path(image.image_url)
+    try:
+        variants, metadata = process_image(path)
+        image.variants = variants or None
+        image.set_metadata(metadata)
+        image.processing_status = 'ready'
+    except Exception as e:
+        print(f"[IMAGE WORKER] Could not process image {image_id}: {e}")
+        image.processing_status = 'failed'
+    db.session.commit()
+
+def enqueue_image_processing(image_id):
+    """Queue an image for the pool; returns False when the pool is saturated.
+    
+    A rejected image is never processed on the request thread: it stays
+    'pending' until `flask images process-pending` picks it up.
+    """
+    if get_image_worker().submit(process_asset_image, image_id):
+        return True
+    print(f"[IMAGE WORKER] Pool full; image {image_id} left pending for images process-pending")
+    return False
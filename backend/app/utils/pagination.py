@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a requested page size (query string value) and clamp it to the allowed range"""
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be a positive integer')
+    if value < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(value, maximum)
+
+def encode_cursor(sort_name, sort_value, row_id):
+    """Encode the sort key and id of the last returned row as an opaque cursor"""
+    payload = json.dumps([sort_name, sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (sort_name, sort_value, row_id)"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        sort_name, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error, UnicodeEncodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(row_id, int):
+        raise ValueError('Invalid cursor')
+    return sort_name, sort_value, row_id
+
+def keyset_filter(id_column, last_id, sort_expr=None, last_value=None, descending=False, nulls_last=False):
+    """Build the WHERE clause selecting rows strictly after (last_value, last_id)
+
+    With nulls_last the query must order the sort expression NULLS LAST; a None
+    last_value then means the previous page ended inside the NULL rows.
+    """
+    after_id = id_column < last_id if descending else id_column > last_id
+    if sort_expr is None:
+        return after_id
+    if nulls_last and last_value is None:
+        return and_(sort_expr.is_(None), after_id)
+    after_value = sort_expr < last_value if descending else sort_expr > last_value
+    clause = or_(after_value, and_(sort_expr == last_value, after_id))
+    if nulls_last:
+        clause = or_(clause, sort_expr.is_(None))
+    return clause
@@ -0,0 +1,259 @@
+import threading
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+from flask import current_app, has_app_context
+from sqlalchemy import inspect
+from app import db
+from app.models.asset import Asset
+from app.models.pricing import PriceRule, PriceRuleType, WEEKEND_DAYS
+from app.utils.cache import LRUCache
+from app.utils.cache_sync import mark_changed, register_cache, sync_shared_caches
+from app.utils.dates import parse_iso_datetime
+from app.utils.session_hooks import collect_flushed
+
+MAX_BREAKDOWN_DAYS = 366
+
+def billable_days(start_date, end_date):
+    """Days charged for a booking: whole days between the dates, at least one"""
+    return max((end_date - start_date).days, 1)
+
+def _weekday(ordinal):
+    # date.fromordinal(1) is a Monday
+    return (ordinal - 1) % 7
+
+class PriceCalendar:
+    """An asset's price rules compiled into per-year daily price prefix sums and minimum stays.
+
+    Years are compiled on first use; pricing any range afterwards is two
+    prefix-sum lookups per calendar year it touches.
+    """
+
+    def __init__(self, base_price, rules):
+        self.base_price = base_price
+        # (rule_type, first ordinal, last ordinal, daily price, min_days), detached from the session
+        compiled = [
+            (
+                rule.rule_type,
+                rule.start_date.toordinal() if rule.start_date else None,
+                rule.end_date.toordinal() if rule.end_date else None,
+                rule.daily_price(base_price),
+                rule.min_days
+            )
+            for rule in sorted(rules, key=lambda rule: (rule.priority or 0, rule.id or 0))
+        ]
+        # Weakest first so that stronger rules overwrite them
+        self._price_rules = [rule for rule in compiled if rule[0] != PriceRuleType.MIN_STAY]
+        self._stay_rules = [rule for rule in compiled if rule[0] == PriceRuleType.MIN_STAY]
+        self._years = {}
+
+    def _compile(self, year):
+        origin = date(year, 1, 1).toordinal()
+        length = date(year + 1, 1, 1).toordinal() - origin
+        prices = [self.base_price] * length
+        min_stays = [1] * length
+
+        def bounds(first, last):
+            low = max(first - origin, 0) if first is not None else 0
+            high = min(last + 1 - origin, length) if last is not None else length
+            return low, high
+
+        for rule_type, first, last, price, _ in self._price_rules:
+            low, high = bounds(first, last)
+            if rule_type == PriceRuleType.WEEKEND:
+                for index in range(low, high):
+                    if _weekday(origin + index) in WEEKEND_DAYS:
+                        prices[index] = price
+            else:
+                prices[low:high] = [price] * max(high - low, 0)
+        for _, first, last, _, min_days in self._stay_rules:
+            low, high = bounds(first, last)
+            for index in range(low, high):
+                min_stays[index] = max(min_stays[index], min_days)
+
+        return origin, array('d', accumulate(prices, initial=0.0)), array('L', min_stays)
+
+    def _year(self, year):
+        block = self._years.get(year)
+        if block is None:
+            block = self._years[year] = self._compile(year)
+        return block
+
+    def _spans(self, first_day, days):
+        """(block, low, high) slices of the compiled years covering days from first_day"""
+        ordinal, end = first_day.toordinal(), first_day.toordinal() + days
+        while ordinal < end:
+            block = self._year(date.fromordinal(ordinal).year)
+            origin, prefix = block[0], block[1]
+            low, high = ordinal - origin, min(end - origin, len(prefix) - 1)
+            yield block, low, high
+            ordinal = origin + high
+
+    def total(self, first_day, days):
+        return sum(prefix[high] - prefix[low] for (_, prefix, _), low, high in self._spans(first_day, days))
+
+    def daily_prices(self, first_day, days):
+        return [
+            prefix[index + 1] - prefix[index]
+            for (_, prefix, _), low, high in self._spans(first_day, days)
+            for index in range(low, high)
+        ]
+
+    def min_stay(self, arrival_day):
+        origin, _, min_stays = self._year(arrival_day.year)
+        return min_stays[arrival_day.toordinal() - origin]
+
+class PricingCache:
+    """Compiled price calendars per asset, invalidated when the asset's price or rules change.
+
+    Follows the shared 'prices' version, so edits made by other workers are seen
+    within CACHE_SYNC_INTERVAL, or immediately after a forced sync.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.generation = 0
+        # Entries are counted, not sized: a calendar holds a few compiled years at most
+        self._calendars = LRUCache(max_entries=max_entries, max_bytes=max_entries)
+        self._lock = threading.Lock()
+
+    def calendar(self, asset_id):
+        cached = self._calendars.get(asset_id)
+        if cached is not None:
+            return cached
+
+        # A rule committed while the queries run bumps the generation; don't cache stale data
+        generation = self.generation
+        base_price = db.session.query(Asset.price_per_day).filter(Asset.id == asset_id).scalar()
+        if base_price is None:
+            raise LookupError('Asset not found')
+        calendar = PriceCalendar(base_price, PriceRule.query.filter_by(asset_id=asset_id).all())
+        with self._lock:
+            if generation == self.generation:
+                self._calendars.set(asset_id, calendar)
+        return calendar
+
+    def invalidate(self, asset_ids=None):
+        """Drop compiled calendars of the given assets, or of every asset"""
+        with self._lock:
+            self.generation += 1
+            if asset_ids is None:
+                self._calendars.clear()
+            else:
+                for asset_id in asset_ids:
+                    self._calendars.delete(asset_id)
+
+    def stats(self):
+        stats = self._calendars.stats()
+        stats['generation'] = self.generation
+        return stats
+
+def init_pricing_cache(app):
+    app.extensions['pricing_cache'] = PricingCache(
+        max_entries=app.config.get('PRICING_CACHE_MAX_ENTRIES', 4096)
+    )
+
+def get_pricing_cache():
+    return current_app.extensions['pricing_cache']
+
+def invalidate_pricing(asset_ids=None):
+    """Drop this process's compiled calendars for the given assets, or for every asset"""
+    if has_app_context() and 'pricing_cache' in current_app.extensions:
+        get_pricing_cache().invalidate(asset_ids)
+
+def mark_pricing_changed(session, asset_ids=None):
+    """Have the session's commit drop compiled prices (of every asset by default) in all processes"""
+    mark_changed(session, 'prices', asset_ids)
+
+def quote_price(asset_id, start_date, end_date, breakdown=False, fresh=False):
+    """Price of booking the asset from start_date to end_date under its price rules.
+
+    Days are charged from the start date's day onwards; the minimum stay is the
+    one in force on that arrival day. With breakdown, the daily prices of up to
+    MAX_BREAKDOWN_DAYS days are included. fresh re-checks the shared cache
+    version first instead of trusting the last periodic sync, for prices that
+    are actually charged.
+    """
+    sync_shared_caches(force=fresh)
+    calendar = get_pricing_cache().calendar(asset_id)
+    first_day = start_date.date()
+    days = billable_days(start_date, end_date)
+    total_price = round(calendar.total(first_day, days), 2)
+    min_stay = calendar.min_stay(first_day)
+    
+    quote = {
+        'days': days,
+        'base_price_per_day': calendar.base_price,
+        'total_price': total_price,
+        'average_price_per_day': round(total_price / days, 2),
+        'min_stay': min_stay,
+        'meets_min_stay': days >= min_stay
+    }
+    if breakdown:
+        shown = min(days, MAX_BREAKDOWN_DAYS)
+        quote['daily_prices'] = [
+            {'date': (first_day + timedelta(days=offset)).isoformat(), 'price': round(price, 2)}
+            for offset, price in enumerate(calendar.daily_prices(first_day, shown))
+        ]
+    return quote
+
+def _number(data, field):
+    value = data.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f'{field} must be a non-negative number')
+    return float(value)
+
+def _day(data, field):
+    value = data.get(field)
+    if value is None:
+        return None
+    try:
+        return parse_iso_datetime(value).date()
+    except ValueError:
+        raise ValueError(f'{field} must be an ISO date')
+
+def parse_price_rule(data):
+    """Validate a price rule payload into PriceRule column values; raises ValueError"""
+    try:
+        rule_type = PriceRuleType(data.get('rule_type'))
+    except ValueError:
+        raise ValueError(f"rule_type must be one of {', '.join(rule_type.value for rule_type in PriceRuleType)}")
+    
+    fields = {
+        'rule_type': rule_type,
+        'start_date': _day(data, 'start_date'),
+        'end_date': _day(data, 'end_date'),
+        'price_per_day': None,
+        'multiplier': None,
+        'min_days': None,
+        'priority': data.get('priority', 0)
+    }
+    if isinstance(fields['priority'], bool) or not isinstance(fields['priority'], int):
+        raise ValueError('priority must be an integer')
+    if fields['start_date'] and fields['end_date'] and fields['start_date'] > fields['end_date']:
+        raise ValueError('end_date must not be before start_date')
+    
+    if rule_type == PriceRuleType.MIN_STAY:
+        min_days = data.get('min_days')
+        if isinstance(min_days, bool) or not isinstance(min_days, int) or min_days < 1:
+            raise ValueError('min_days must be a positive integer')
+        fields['min_days'] = min_days
+    else:
+        if rule_type == PriceRuleType.SEASON and not (fields['start_date'] and fields['end_date']):
+            raise ValueError('Season rules need a start_date and an end_date')
+        fields['price_per_day'] = _number(data, 'price_per_day')
+        fields['multiplier'] = _number(data, 'multiplier')
+        if (fields['price_per_day'] is None) == (fields['multiplier'] is None):
+            raise ValueError('Provide exactly one of price_per_day or multiplier')
+    return fields
+
+register_cache('prices', invalidate_pricing)
+
+@collect_flushed
+def _track_pricing_assets(session, instance):
+    if isinstance(instance, PriceRule) and instance.asset_id is not None:
+        mark_changed(session, 'prices', (instance.asset_id,))
+    elif isinstance(instance, Asset) and instance.id is not None \
+            and inspect(instance).attrs.price_per_day.history.has_changes():
+        mark_changed(session, 'prices', (instance.id,))
@@ -0,0 +1,63 @@
+from app import db
+from app.models.booking import Booking, BookingStatus
+from app.utils.pricing import quote_price
+
+class BookingConflict(Exception):
+    """The requested dates overlap an active booking of the asset"""
+
+def reserve_asset(asset, client_id, start_date, end_date, special_requests=None):
+    """Atomically check availability and insert a pending booking, committing it.
+    
+    The asset lock is taken before the overlap query, so two concurrent requests
+    for the same dates cannot both pass the check. Raises BookingConflict when
+    the dates are taken. The total comes from the asset's current price rules,
+    re-checked against edits made by other workers.
+    """
+    try:
+        Booking.lock_asset(asset.id)
+        
+        conflict = db.session.query(Booking.id).filter(
+            Booking.asset_id == asset.id,
+            Booking.conflicts_with(start_date, end_date)
+        ).first()
+        if conflict:
+            raise BookingConflict('Asset is already booked for the selected dates')
+        
+        booking = Booking(
+            client_id=client_id,
+            owner_id=asset.owner_id,
+            asset_id=asset.id,
+            start_date=start_date,
+            end_date=end_date,
+            total_price=quote_price(asset.id, start_date, end_date, fresh=True)['total_price'],
+            special_requests=special_requests
+        )
+        db.session.add(booking)
+        db.session.commit()
+        return booking
+    except Exception:
+        db.session.rollback()
+        raise
+
+def lock_assets(asset_ids):
+    """Take the reservation lock of several assets, in id order so concurrent callers can't deadlock"""
+    for asset_id in sorted(set(asset_ids)):
+        Booking.lock_asset(asset_id)
+
+def confirmed_ranges(asset_ids, window_start, window_end, exclude_ids=()):
+    """{asset_id: [(start_date, end_date), ...]} of confirmed bookings overlapping the window"""
+    query = db.session.query(Booking.asset_id, Booking.start_date, Booking.end_date).filter(
+        Booking.asset_id.in_(set(asset_ids)),
+        Booking.status == BookingStatus.CONFIRMED,
+        Booking.start_date < window_end,
+        Booking.end_date > window_start
+    )
+    if exclude_ids:
+        query = query.filter(Booking.id.notin_(list(exclude_ids)))
+    ranges = {}
+    for asset_id, start_date, end_date in query:
+        ranges.setdefault(asset_id, []).append((start_date, end_date))
+    return ranges
+
+def overlaps_any(ranges, start_date, end_date):
+    return any(start < end_date and end > start_date for start, end in ranges)
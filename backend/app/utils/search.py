@@ -0,0 +1,55 @@
+import re
+from sqlalchemy import column, func, literal_column, select, table, text
+from app import db
+from app.models.asset import Asset
+
+# Per-column bm25 weights, in the column order of the assets_fts table
+FTS_WEIGHTS = {'title': 10.0, 'description': 1.0, 'brand': 5.0, 'model': 5.0, 'location': 3.0}
+
+assets_fts = table('assets_fts', column('rowid'))
+
+def fts_enabled():
+    """Full-text search is backed by an SQLite FTS5 table"""
+    return db.engine.dialect.name == 'sqlite'
+
+def build_match_expression(text_query):
+    """Turn free text into a safe FTS5 query: every term must match, as a prefix"""
+    terms = re.findall(r'\w+', text_query, flags=re.UNICODE)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def apply_text_search(query, text_query):
+    """Restrict an Asset query to matches for text_query.
+
+    Returns (query, rank) where rank is a bm25 expression (lower is better), or None
+    when the database has no FTS index and a plain substring match is used instead.
+    """
+    if not fts_enabled():
+        pattern = f'%{text_query}%'
+        return query.filter(db.or_(
+            Asset.title.ilike(pattern),
+            Asset.description.ilike(pattern),
+            Asset.brand.ilike(pattern),
+            Asset.model.ilike(pattern),
+            Asset.location.ilike(pattern)
+        )), None
+
+    match = build_match_expression(text_query)
+    if not match:
+        return query.filter(db.false()), None
+
+    ranked = select(
+        assets_fts.c.rowid.label('asset_id'),
+        func.bm25(literal_column('assets_fts'), *FTS_WEIGHTS.values()).label('rank')
+    ).select_from(assets_fts).where(
+        literal_column('assets_fts').op('MATCH')(match)
+    ).subquery('search')
+
+    return query.join(ranked, ranked.c.asset_id == Asset.id), ranked.c.rank
+
+def rebuild_search_index():
+    """Rebuild the FTS index from the current contents of the assets table"""
+    if not fts_enabled():
+        return False
+    db.session.execute(text("INSERT INTO assets_fts(assets_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    return True
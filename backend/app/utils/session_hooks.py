@@ -0,0 +1,38 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# key -> handler(values) run after the transaction that deferred values commits
+_commit_handlers = {}
+_flush_collectors = []
+
+def on_commit(key, handler):
+    """Register the handler for work deferred under key"""
+    _commit_handlers[key] = handler
+
+def collect_flushed(collector):
+    """Call collector(session, instance) for every instance a flush inserts, updates or deletes"""
+    _flush_collectors.append(collector)
+    return collector
+
+def defer(session, key, *values):
+    """Queue values for key's commit handler; they are discarded if the transaction rolls back"""
+    session.info.setdefault('deferred', {}).setdefault(key, []).extend(values)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_instances(session, flush_context):
+    if not _flush_collectors:
+        return
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        for collector in _flush_collectors:
+            collector(session, instance)
+
+@event.listens_for(Session, 'after_commit')
+def _run_deferred(session):
+    deferred = session.info.pop('deferred', None)
+    for key, values in (deferred or {}).items():
+        if key in _commit_handlers:
+            _commit_handlers[key](values)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_deferred(session):
+    session.info.pop('deferred', None)
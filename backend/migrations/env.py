@@ -45,6 +45,20 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Tables created with raw SQL in migrations and absent from the models; autogenerate
+# would otherwise emit drop_table for them
+UNMANAGED_TABLE_PREFIXES = (
+    'assets_fts',  # FTS5 search index and its shadow tables (9482067c860a)
+    'assets_geo',  # R*Tree location index and its shadow tables (40a336db3782)
+)
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return not name.startswith(UNMANAGED_TABLE_PREFIXES)
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +79,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -97,6 +112,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
+            include_name=include_name,
             **current_app.extensions['migrate'].configure_args
         )
 
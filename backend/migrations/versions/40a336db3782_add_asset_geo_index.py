@@ -0,0 +1,59 @@
+"""Add R*Tree spatial index for asset coordinates
+
+Revision ID: 40a336db3782
+Revises: 9482067c860a
+Create Date: 2026-10-17 10:03:27.552190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '40a336db3782'
+down_revision = '9482067c860a'
+branch_labels = None
+depends_on = None
+
+HAS_COORDINATES = 'new.latitude IS NOT NULL AND new.longitude IS NOT NULL'
+NEW_POINT = 'new.id, new.latitude, new.latitude, new.longitude, new.longitude'
+
+
+def upgrade():
+    # Points are stored as degenerate boxes; triggers keep the index in sync with assets
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_index('ix_assets_latitude_longitude', 'assets', ['latitude', 'longitude'], unique=False)
+        return
+
+    op.execute('CREATE VIRTUAL TABLE assets_geo USING rtree(id, min_lat, max_lat, min_lng, max_lng)')
+    op.execute(
+        f"CREATE TRIGGER assets_geo_ai AFTER INSERT ON assets WHEN {HAS_COORDINATES} BEGIN "
+        f"INSERT INTO assets_geo VALUES ({NEW_POINT}); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER assets_geo_ad AFTER DELETE ON assets BEGIN "
+        "DELETE FROM assets_geo WHERE id = old.id; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER assets_geo_au AFTER UPDATE OF latitude, longitude ON assets BEGIN "
+        "DELETE FROM assets_geo WHERE id = old.id; "
+        f"INSERT INTO assets_geo SELECT {NEW_POINT} WHERE {HAS_COORDINATES}; "
+        "END"
+    )
+    op.execute(
+        "INSERT INTO assets_geo SELECT id, latitude, latitude, longitude, longitude "
+        "FROM assets WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_index('ix_assets_latitude_longitude', table_name='assets')
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS assets_geo_au')
+    op.execute('DROP TRIGGER IF EXISTS assets_geo_ad')
+    op.execute('DROP TRIGGER IF EXISTS assets_geo_ai')
+    op.execute('DROP TABLE IF EXISTS assets_geo')
@@ -0,0 +1,28 @@
+"""Recount assets.booking_count without cancelled bookings
+
+Revision ID: 4d991b941f34
+Revises: 6e947d6ac68c
+Create Date: 2026-10-18 16:02:41.337180
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d991b941f34'
+down_revision = '6e947d6ac68c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The d748f1180b9b backfill used to count cancelled bookings as well
+    op.execute(
+        "UPDATE assets SET "
+        "booking_count = (SELECT COUNT(*) FROM bookings b WHERE b.asset_id = assets.id AND b.status != 'CANCELLED')"
+    )
+
+
+def downgrade():
+    pass
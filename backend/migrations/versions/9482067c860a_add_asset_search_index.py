@@ -0,0 +1,59 @@
+"""Add FTS5 search index for assets
+
+Revision ID: 9482067c860a
+Revises: 7c52e103df32
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9482067c860a'
+down_revision = '7c52e103df32'
+branch_labels = None
+depends_on = None
+
+FTS_COLUMNS = 'title, description, brand, model, location'
+NEW_VALUES = 'new.title, new.description, new.brand, new.model, new.location'
+OLD_VALUES = 'old.title, old.description, old.brand, old.model, old.location'
+
+
+def upgrade():
+    # The FTS5 table is an external-content index over assets, kept in sync by triggers
+    # so that every write path (ORM, bulk statements, raw SQL) updates it.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE assets_fts USING fts5({FTS_COLUMNS}, "
+        "content='assets', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER assets_fts_ai AFTER INSERT ON assets BEGIN "
+        f"INSERT INTO assets_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, {NEW_VALUES}); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER assets_fts_ad AFTER DELETE ON assets BEGIN "
+        f"INSERT INTO assets_fts(assets_fts, rowid, {FTS_COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES}); "
+        "END"
+    )
+    op.execute(
+        f"CREATE TRIGGER assets_fts_au AFTER UPDATE OF {FTS_COLUMNS} ON assets BEGIN "
+        f"INSERT INTO assets_fts(assets_fts, rowid, {FTS_COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES}); "
+        f"INSERT INTO assets_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, {NEW_VALUES}); "
+        "END"
+    )
+    op.execute("INSERT INTO assets_fts(assets_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS assets_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS assets_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS assets_fts_ai')
+    op.execute('DROP TABLE IF EXISTS assets_fts')
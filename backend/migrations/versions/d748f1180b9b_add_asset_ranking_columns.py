@@ -0,0 +1,47 @@
+"""Add denormalized ranking columns and sort indexes to assets
+
+Revision ID: d748f1180b9b
+Revises: 3aaafd81a311
+Create Date: 2026-10-17 12:40:55.104377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd748f1180b9b'
+down_revision = '3aaafd81a311'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN (not batch mode) so the assets table and its search triggers are kept
+    op.add_column('assets', sa.Column('rating_avg', sa.Float(), server_default='0', nullable=False))
+    op.add_column('assets', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('assets', sa.Column('booking_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE assets SET "
+        "rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.asset_id = assets.id AND r.review_type = 'asset'), "
+        "rating_avg = COALESCE((SELECT AVG(r.rating) FROM reviews r WHERE r.asset_id = assets.id AND r.review_type = 'asset'), 0), "
+        "booking_count = (SELECT COUNT(*) FROM bookings b WHERE b.asset_id = assets.id AND b.status != 'CANCELLED')"
+    )
+
+    op.create_index('ix_assets_available_price', 'assets', ['is_available', 'price_per_day', 'id'], unique=False)
+    op.create_index('ix_assets_available_rating', 'assets', ['is_available', 'rating_avg', 'id'], unique=False)
+    op.create_index('ix_assets_available_popularity', 'assets', ['is_available', 'booking_count', 'id'], unique=False)
+    op.create_index('ix_assets_available_created', 'assets', ['is_available', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_assets_available_created', table_name='assets')
+    op.drop_index('ix_assets_available_popularity', table_name='assets')
+    op.drop_index('ix_assets_available_rating', table_name='assets')
+    op.drop_index('ix_assets_available_price', table_name='assets')
+
+    # Native DROP COLUMN (SQLite 3.35+) avoids recreating assets and losing its triggers
+    op.execute('ALTER TABLE assets DROP COLUMN booking_count')
+    op.execute('ALTER TABLE assets DROP COLUMN rating_count')
+    op.execute('ALTER TABLE assets DROP COLUMN rating_avg')